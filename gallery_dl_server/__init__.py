@@ -28,6 +28,22 @@ def run(
     log_level: str = "info",
     server_log_level: str = "info",
     access_log: bool = False,
+    max_workers: int = 4,
+    host_max_workers: int = 0,
+    host_delay: float = 0.0,
+    dedupe_ttl: float = 0.0,
+    drain_timeout: float = 20.0,
+    job_timeout: float = 0.0,
+    stall_timeout: float = 0.0,
+    memory_limit: int = 0,
+    progress_rate: float = 4.0,
+    log_max_size: int = 10,
+    log_max_age: float = 0.0,
+    log_backups: int = 5,
+    log_format: str = "text",
+    job_logs: bool = False,
+    request_options: str = options.DEFAULT_REQUEST_OPTIONS,
+    start_method: str = "default",
 ) -> None:
     """
     Run gallery-dl-server with custom options.
@@ -51,6 +67,53 @@ def run(
         access_log (bool): Enable or disable the access log only, without changing the log level
             (i.e. show `GET` requests, WebSocket connections, etc.).
 
+        max_workers (int): The maximum number of downloads to run at the same time
+            (further downloads wait in a queue until a worker is free).
+
+        host_max_workers (int): The maximum number of downloads to run at the same time
+            for a single site (`0` means no limit other than `max_workers`).
+
+        host_delay (float): The minimum number of seconds between starting downloads
+            from the same site.
+
+        dedupe_ttl (float): The number of seconds during which a URL that was downloaded
+            successfully is not downloaded again if it is resubmitted with the same options.
+
+        drain_timeout (float): The number of seconds to wait for running downloads to finish
+            on shutdown before they are stopped and queued again for the next startup.
+
+        job_timeout (float): The maximum number of seconds a download may run for
+            before it is stopped and marked as failed (`0` means no limit).
+
+        stall_timeout (float): The number of seconds a download may go without any progress
+            or log output before it is stopped and marked as failed (`0` means no limit).
+
+        memory_limit (int): The maximum resident memory of a download process in MiB
+            before it is stopped and marked as failed (`0` means no limit, Linux only).
+
+        progress_rate (float): The maximum number of progress updates per second
+            that each download reports (`0` means no limit).
+
+        log_max_size (int): The size in MiB at which the log file is rotated
+            (`0` disables rotation by size).
+
+        log_max_age (float): The number of days after which the log file is rotated
+            (`0` disables rotation by age).
+
+        log_backups (int): The number of rotated and compressed log files to keep
+            (`0` keeps all of them).
+
+        log_format (str): The format of the log file
+            (accepted values: `text`, `json`).
+
+        job_logs (bool): Write the output of each job to a separate log file as well.
+
+        request_options (str): The comma-separated gallery-dl options that download requests
+            may override (an empty string disables overrides).
+
+        start_method (str): The method used to start download processes
+            (accepted values: `default`, `spawn`, `fork`, `forkserver`).
+
     Raises:
         TypeError: If an invalid parameter is passed to the function, it will raise a `TypeError`.
 
@@ -93,6 +156,22 @@ def run(
         "log_level": log_level.lower(),
         "server_log_level": server_log_level.lower(),
         "access_log": access_log,
+        "max_workers": max_workers,
+        "host_max_workers": host_max_workers,
+        "host_delay": float(host_delay),
+        "dedupe_ttl": float(dedupe_ttl),
+        "drain_timeout": float(drain_timeout),
+        "job_timeout": float(job_timeout),
+        "stall_timeout": float(stall_timeout),
+        "memory_limit": memory_limit,
+        "progress_rate": float(progress_rate),
+        "log_max_size": log_max_size,
+        "log_max_age": float(log_max_age),
+        "log_backups": log_backups,
+        "log_format": log_format.lower(),
+        "job_logs": job_logs,
+        "request_options": options.split_names(request_options),
+        "start_method": start_method.lower(),
     }
 
     try:
@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import uvicorn
-
 from . import options
 
 
@@ -11,6 +9,9 @@ def main(
     is_main_module: bool = False,
 ):
     """Main entry point for gallery-dl-server."""
+    # imported here so that download processes importing the package do not load it
+    import uvicorn
+
     if args is None:
         args = options.parse_args(is_main_module)
 
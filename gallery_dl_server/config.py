@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import copy
 import logging
 import os
+import re
+import string
 import sys
+import threading
 
-from typing import Any
+from typing import Any, Callable
 
 from gallery_dl import config
 
@@ -15,12 +19,49 @@ _files: list[str] = config._files
 
 log = output.initialise_logging(__name__)
 
+NEW_EXTS = [".toml", ".yaml", ".yml"]
+
+Overlay = tuple[dict[str, Any], list[Any], list[Any]]
+
+# gallery-dl options that requests may override, with their configuration paths and types
+OVERRIDES: dict[str, tuple[tuple[str, ...], tuple[type, ...]]] = {
+    "directory": (("extractor", "directory"), (list, str)),
+    "filename": (("extractor", "filename"), (str,)),
+    "range": (("extractor", "image-range"), (str, int)),
+    "chapter-range": (("extractor", "chapter-range"), (str, int)),
+    "filter": (("extractor", "image-filter"), (str,)),
+    "chapter-filter": (("extractor", "chapter-filter"), (str,)),
+    "skip": (("extractor", "skip"), (bool, str)),
+    "sleep": (("extractor", "sleep"), (int, float, str)),
+    "sleep-request": (("extractor", "sleep-request"), (int, float, str)),
+    "rate": (("downloader", "rate"), (int, str)),
+    "retries": (("downloader", "retries"), (int,)),
+    "timeout": (("downloader", "timeout"), (int, float)),
+}
+
+CATEGORY_PATTERN = re.compile(r"[a-z0-9_-]+")
+
+# plain metadata fields, e.g. "{id}", "{user[name]}" or "{title|id}", but not fields
+# starting with "_" or "'" such as "{_env[HOME]}" or "{_lit[..]}"
+FIELD_NAME = r"[A-Za-z]\w*(?:\[[\w:-]*\]|\.[A-Za-z]\w*)*"
+FIELD_NAME_PATTERN = re.compile(rf"{FIELD_NAME}(?:\|{FIELD_NAME})*")
+
+# a width and type, e.g. "03" or "x", or strftime directives, e.g. "%Y-%m-%d", but no fill
+# character, precision or dots that could render as "..", and no gallery-dl specs
+FORMAT_SPEC_PATTERN = re.compile(r"\d*[bdnosx]?|%[\w%: -]*")
+
 
 def clear(conf: dict[str, Any] = _config):
     """Clear loaded configuration."""
     conf.clear()
 
 
+def apply(conf: dict[str, Any]):
+    """Replace loaded configuration with an already parsed configuration dict."""
+    clear()
+    _config.update(conf)
+
+
 def get_default_configs():
     """Return default gallery-dl configuration file locations."""
     if utils.CONTAINER:
@@ -76,8 +117,7 @@ def load():
     exit_codes: list[int | str | None] = []
     messages: list[str] = []
 
-    new_exts = [".toml", ".yaml", ".yml"]
-    _configs = get_new_configs(get_default_configs(), new_exts)
+    _configs = get_new_configs(get_default_configs(), NEW_EXTS)
 
     log_buffer = output.StringLogger()
 
@@ -164,6 +204,319 @@ def log_results(
         raise SystemExit(1)
 
 
+class ConfigCache:
+    """Parsed gallery-dl configuration, reloaded only when a configuration file changes.
+
+    The configuration is keyed by the modification times and sizes of the files found,
+    so a reload that finds the same files unchanged does not parse them again. If a
+    reload fails to load any file, the previously loaded configuration is kept.
+
+    The overlay of each video-options profile is compiled once per loaded configuration
+    and shared by all jobs requesting it.
+    """
+
+    def __init__(self):
+        self.paths = [
+            utils.normalise_path(path) for path in get_new_configs(get_default_configs(), NEW_EXTS)
+        ]
+        self.lock = threading.RLock()
+        self.key: tuple[tuple[str, int, int], ...] | None = None
+        self.conf: dict[str, Any] | None = None
+        self.overlays: dict[str, Overlay] = {}
+
+    def directories(self):
+        """Return the existing directories that may contain configuration files."""
+        directories = {os.path.dirname(path) for path in self.paths}
+
+        return sorted(directory for directory in directories if os.path.isdir(directory))
+
+    def stat(self):
+        """Return the modification times and sizes of the configuration files found."""
+        key: list[tuple[str, int, int]] = []
+
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            key.append((path, stat.st_mtime_ns, stat.st_size))
+
+        return tuple(key)
+
+    def refresh(self):
+        """Reload the configuration if any configuration file was added, changed or removed.
+
+        Return whether a new configuration was loaded.
+        """
+        with self.lock:
+            key = self.stat()
+            if key == self.key:
+                return False
+
+            self.key = key
+            return self.reload()
+
+    def reload(self):
+        """Load the configuration files into the gallery-dl configuration dict.
+
+        Return whether any configuration file was loaded.
+        """
+        clear()
+        _files.clear()
+
+        try:
+            load()
+        except SystemExit:
+            if self.conf is not None:
+                log.warning("Keeping the previously loaded configuration")
+                apply(self.conf)
+            return False
+
+        # the loaded files are parsed into new dicts, so a shallow copy is not shared
+        self.conf = dict(_config)
+        self.overlays.clear()
+        return True
+
+    def resolve(self, video_options: str, overrides: dict[str, Any] | None = None):
+        """Return the current configuration with a video-options profile and the
+        validated gallery-dl options of a request applied.
+
+        The entries added and removed by the profile are returned with it. The
+        configuration is `None` if no configuration file could be loaded.
+        """
+        with self.lock:
+            self.refresh()
+
+            if self.conf is None:
+                return None, [], []
+
+            # only known profiles are cached, as the name comes from the request
+            if video_options in VIDEO_OPTIONS:
+                if video_options not in self.overlays:
+                    self.overlays[video_options] = compile_overlay(self.conf, video_options)
+
+                conf, entries_added, entries_removed = self.overlays[video_options]
+            else:
+                conf, entries_added, entries_removed = self.conf, [], []
+
+        if overrides:
+            conf = overlay(conf, overrides_to_entries(overrides))
+
+        return conf, entries_added, entries_removed
+
+
+def download_video(ytdl: dict[str, Any]):
+    """Remove audio extraction from the ytdl options."""
+    cmdline_args = get(["cmdline-args"], conf=ytdl)
+    raw_options = get(["raw-options"], conf=ytdl)
+    postprocessors = get(["postprocessors"], conf=raw_options)
+
+    entries_removed = [
+        *remove(cmdline_args, item="--extract-audio"),
+        *remove(cmdline_args, item="-x"),
+        *remove(raw_options, key="writethumbnail", value=False),
+        *remove(postprocessors, key="key", value="FFmpegExtractAudio"),
+    ]
+
+    return [], entries_removed
+
+
+def extract_audio(ytdl: dict[str, Any]):
+    """Add audio extraction to the ytdl options."""
+    entries_added = [
+        *add({"cmdline-args": ["--extract-audio"]}, conf=ytdl)[1],
+        *add(
+            {
+                "raw-options": {
+                    "writethumbnail": False,
+                    "postprocessors": [
+                        {
+                            "key": "FFmpegExtractAudio",
+                            "preferredcodec": "best",
+                            "preferredquality": 320,
+                        }
+                    ],
+                }
+            },
+            conf=ytdl,
+        )[1],
+    ]
+
+    entries_removed = remove(
+        get(["cmdline-args"], conf=ytdl), item="--merge-output-format", value="any"
+    )
+
+    return entries_added, entries_removed
+
+
+VIDEO_OPTIONS: dict[str, Callable[[dict[str, Any]], tuple[list[Any], list[Any]]]] = {
+    "download-video": download_video,
+    "extract-audio": extract_audio,
+}
+
+
+def compile_overlay(conf: dict[str, Any], video_options: str) -> Overlay:
+    """Return a configuration with a video-options profile applied to the ytdl options.
+
+    Only the dicts on the path to the ytdl options are copied; all other entries are
+    shared with `conf`, which is left unchanged.
+    """
+    profile = VIDEO_OPTIONS.get(video_options)
+
+    if profile is None:
+        return conf, [], []
+
+    ytdl = copy.deepcopy(get(["extractor", "ytdl"], conf=conf))
+    if not isinstance(ytdl, dict):
+        ytdl = {}
+
+    entries_added, entries_removed = profile(ytdl)
+
+    if not entries_added and not entries_removed:
+        return conf, [], []
+
+    return overlay(conf, {("extractor", "ytdl"): ytdl}), entries_added, entries_removed
+
+
+def overlay(conf: dict[str, Any], entries: dict[tuple[str, ...], Any]) -> dict[str, Any]:
+    """Return a copy of a nested dict with values set at the given key paths.
+
+    Only the dicts on the paths are copied, each of them once; all other entries are
+    shared with `conf`.
+    """
+    result = dict(conf)
+    children: dict[str, dict[tuple[str, ...], Any]] = {}
+
+    for (key, *rest), value in entries.items():
+        if rest:
+            children.setdefault(key, {})[tuple(rest)] = value
+        else:
+            result[key] = value
+
+    for key, child_entries in children.items():
+        child = conf.get(key)
+        result[key] = overlay(child if isinstance(child, dict) else {}, child_entries)
+
+    return result
+
+
+def validate_overrides(overrides: Any, allowed: list[str]):
+    """Return validated gallery-dl options from a request.
+
+    Raise `ValueError` if an option is not allowed or has a value of the wrong type.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("Expected 'options' to be a JSON object")
+
+    result: dict[str, Any] = {}
+
+    for name, value in overrides.items():
+        if name not in allowed:
+            raise ValueError(f"Option '{name}' is not allowed")
+
+        if name == "extractor":
+            result[name] = validate_extractor_overrides(value, allowed)
+        else:
+            result[name] = validate_override(name, value)
+
+    return result
+
+
+def validate_extractor_overrides(overrides: Any, allowed: list[str]):
+    """Return validated extractor options from a request, keyed by extractor category."""
+    if not isinstance(overrides, dict):
+        raise ValueError("Expected 'extractor' to be a JSON object of extractor categories")
+
+    result: dict[str, dict[str, Any]] = {}
+
+    for category, options in overrides.items():
+        if not CATEGORY_PATTERN.fullmatch(category) or not isinstance(options, dict):
+            raise ValueError(f"Invalid options for extractor '{category}'")
+
+        result[category] = {}
+
+        for name, value in options.items():
+            if name not in allowed or name not in OVERRIDES or OVERRIDES[name][0][0] != "extractor":
+                raise ValueError(f"Option '{name}' is not allowed for extractor '{category}'")
+
+            result[category][name] = validate_override(name, value)
+
+    return result
+
+
+def validate_override(name: str, value: Any):
+    """Return an option value if it has one of the types expected for the option."""
+    types = OVERRIDES[name][1]
+
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        raise ValueError(f"Invalid value for option '{name}'")
+
+    if name == "directory" and isinstance(value, str):
+        value = [value]
+
+    if name in ("directory", "filename"):
+        segments = value if isinstance(value, list) else [value]
+
+        if not all(isinstance(segment, str) for segment in segments):
+            raise ValueError(f"Expected '{name}' to be a list of strings")
+
+        for segment in segments:
+            validate_path_format(name, segment)
+
+    return value
+
+
+def validate_path_format(name: str, segment: str):
+    """Check that a path format string from a request cannot leave the base directory.
+
+    The literal text, taken together, may not contain path separators or `..`.
+    Replacement fields are limited to metadata fields without conversions, so literals
+    and globals such as `{_lit[..]}` or `{_env[HOME]}` are rejected, and format specs
+    are limited to a width and type or strftime directives, so they cannot add dots.
+    """
+    # format strings starting with a form feed are evaluated as Python code by gallery-dl
+    if segment.startswith("\f"):
+        raise ValueError(f"Special format strings are not allowed for option '{name}'")
+
+    try:
+        parsed = list(string.Formatter().parse(segment))
+    except ValueError:
+        raise ValueError(f"Invalid format string for option '{name}'")
+
+    literal = "".join(text for text, *_ in parsed)
+
+    if "/" in literal or "\\" in literal or ".." in literal:
+        raise ValueError(f"Path separators and '..' are not allowed for option '{name}'")
+
+    for _, field_name, format_spec, conversion in parsed:
+        if field_name is None:
+            continue
+
+        if (
+            not FIELD_NAME_PATTERN.fullmatch(field_name)
+            or conversion is not None
+            or not FORMAT_SPEC_PATTERN.fullmatch(format_spec or "")
+        ):
+            field = field_name + (f"!{conversion}" if conversion else "")
+            field += f":{format_spec}" if format_spec else ""
+            raise ValueError(f"Replacement field '{{{field}}}' is not allowed for '{name}'")
+
+
+def overrides_to_entries(overrides: dict[str, Any]):
+    """Return the configuration entries set by validated request options, keyed by path."""
+    entries: dict[tuple[str, ...], Any] = {}
+
+    for name, value in overrides.items():
+        if name == "extractor":
+            for category, options in value.items():
+                for option, option_value in options.items():
+                    entries[("extractor", category, OVERRIDES[option][0][-1])] = option_value
+        else:
+            entries[OVERRIDES[name][0]] = value
+
+    return entries
+
+
 def get(
     path: list[str],
     default: Any = None,
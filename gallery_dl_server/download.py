@@ -1,12 +1,64 @@
 # -*- coding: utf-8 -*-
 
-from itertools import chain
-from multiprocessing.queues import Queue
+import importlib
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
 from typing import Any
 
 from gallery_dl import job, exception
 
-from . import options
+from . import options, utils
+
+PRELOAD_MODULES = [
+    "gallery_dl_server.download",
+    "gallery_dl.job",
+    "gallery_dl.extractor",
+    "gallery_dl.downloader",
+    "gallery_dl.postprocessor",
+    "gallery_dl.ytdl",
+    "yt_dlp",
+]
+
+
+def get_context(start_method: str = "default"):
+    """Return the multiprocessing context used to start download processes.
+
+    With the `forkserver` start method, a template process imports gallery-dl and yt-dlp
+    once and each download process is forked from it with these modules already loaded.
+    """
+    if start_method == "default":
+        return multiprocessing.get_context()
+
+    context = multiprocessing.get_context(start_method)
+
+    if start_method == "forkserver":
+        context.set_forkserver_preload(PRELOAD_MODULES)
+
+    return context
+
+
+def prestart(context: BaseContext):
+    """Prepare the start of download processes ahead of the first download.
+
+    With the `forkserver` start method, its template process is started. With the `fork`
+    start method, the modules needed by downloads are imported so that each download
+    process inherits them.
+    """
+    start_method = context.get_start_method()
+
+    if start_method == "forkserver":
+        from multiprocessing import forkserver
+
+        forkserver.ensure_running()
+    elif start_method == "fork":
+        for module_name in PRELOAD_MODULES:
+            importlib.import_module(module_name)
 
 
 def _init(custom_args: options.CustomNamespace | None):
@@ -29,34 +81,54 @@ def _init(custom_args: options.CustomNamespace | None):
 
 def run(
     url: str,
-    request_options: dict[str, str],
-    log_queue: Queue[dict[str, Any]],
-    return_status: Queue[int],
+    conf: dict[str, Any] | None,
+    connection: Connection,
     custom_args: options.CustomNamespace | None,
+    start_time: float | None = None,
+    job_id: int | None = None,
 ):
-    """Set gallery-dl configuration, set up logging and run download job."""
+    """Set gallery-dl configuration, set up logging and run download job.
+
+    The configuration `conf` is parsed once by the server, with the request options
+    already applied, and passed to each download process; if it is `None`, no
+    configuration file could be loaded and the job fails.
+
+    Log records, progress updates and finally the result of the download job
+    are sent to the parent process through `connection`.
+    """
+    if not utils.WINDOWS:
+        # start a new process group so the job can be paused or cancelled as a whole
+        os.setsid()
+
+    # do not run the server's signal handlers inherited from a forked parent
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
     _init(custom_args)
 
-    config.clear()
-    config.load()
+    server_handler = output.PipeHandler(connection, job_id)
+    server_handler.setFormatter(logging.Formatter("%(message)s"))
+    output.forward_logs(server_handler, log, config.log)
 
-    output.setup_logging()
-    output.capture_logs(log_queue)
-    output.redirect_standard_streams()
+    if conf is None:
+        log.error("No gallery-dl configuration loaded")
+        raise SystemExit(1)
 
-    log.info(f"Requested download with the following options: {request_options}")
+    config.apply(conf)
 
-    entries = config_update(request_options)
+    output.setup_logging()
+    pipe_handler = output.capture_logs(connection, job_id)
+    logger_writer = output.redirect_standard_streams()
+    output.forward_logs(server_handler, logger_writer.logger)
 
-    if any(entries[0]):
-        log.info(f"Added entries to the config dict: {entries[0]}")
+    if start_time is not None:
+        log.debug(f"Download process ready after {(time.time() - start_time) * 1000:.0f} ms")
 
-    if any(entries[1]):
-        log.info(f"Removed entries from the config dict: {entries[1]}")
+    DownloadJob.pipe_handler = pipe_handler
 
     status = 0
     try:
-        status = job.DownloadJob(url).run()
+        status = DownloadJob(url).run()
     except exception.GalleryDLException as e:
         status = e.code
         log.error(f"Exception: {e.__module__}.{type(e).__name__}: {e}")
@@ -66,72 +138,65 @@ def run(
     except KeyboardInterrupt:
         pass
 
+    DownloadJob.flush_progress()
+    logger_writer.flush_progress()
     output.close_handlers()
 
-    return_status.put(status)
-
-
-def config_update(request_options: dict[str, str]):
-    """Update loaded configuration with request options."""
-    entries_added: list[dict[str, Any] | None] = []
-    entries_removed: list[Any] = []
-
-    requested_format = request_options.get("video-options", "none-selected")
-
-    if requested_format == "none-selected":
-        return entries_added, entries_removed
-
-    cmdline_args = config.get(["extractor", "ytdl", "cmdline-args"])
-    raw_options = config.get(["extractor", "ytdl", "raw-options"])
-    postprocessors = config.get(["postprocessors"], conf=raw_options)
-
-    if requested_format == "download-video":
-        entries_removed.extend(
-            chain(
-                config.remove(cmdline_args, item="--extract-audio"),
-                config.remove(cmdline_args, item="-x"),
-                config.remove(raw_options, key="writethumbnail", value=False),
-                config.remove(postprocessors, key="key", value="FFmpegExtractAudio"),
-            )
-        )
-
-    if requested_format == "extract-audio":
-        entries_added.extend(
-            chain(
-                config.add(
-                    {
-                        "extractor": {
-                            "ytdl": {
-                                "cmdline-args": [
-                                    "--extract-audio",
-                                ]
-                            }
-                        }
-                    }
-                )[1],
-                config.add(
-                    {
-                        "extractor": {
-                            "ytdl": {
-                                "raw-options": {
-                                    "writethumbnail": False,
-                                    "postprocessors": [
-                                        {
-                                            "key": "FFmpegExtractAudio",
-                                            "preferredcodec": "best",
-                                            "preferredquality": 320,
-                                        }
-                                    ],
-                                }
-                            }
-                        }
-                    }
-                )[1],
-            )
-        )
-
-        entries_removed.extend(
-            config.remove(cmdline_args, item="--merge-output-format", value="any")
-        )
-
-    return entries_added, entries_removed
+    pipe_handler.send(
+        {
+            "result": {
+                "status": status,
+                "files": DownloadJob.files,
+                "bytes": DownloadJob.bytes,
+            }
+        }
+    )
+    connection.close()
+
+
+class DownloadJob(job.DownloadJob):
+    """Download job that counts the files downloaded and their total size.
+
+    Download progress is sent to the parent process at most once per
+    `PROGRESS_INTERVAL` seconds. The latest progress of a file is always sent
+    when it finishes downloading.
+    """
+
+    files = 0
+    bytes = 0
+    pipe_handler: "output.PipeHandler | None" = None
+    last_progress = 0.0
+    pending_progress: tuple[int | None, int, int] | None = None
+
+    def __init__(self, url, parent=None):
+        super().__init__(url, parent)
+        self.out_success = self.out.success
+        self.out.success = self.success
+        self.out.progress = self.progress
+
+    def progress(self, bytes_total: int | None, bytes_downloaded: int, bytes_per_second: int):
+        """Report download progress to the parent process."""
+        DownloadJob.pending_progress = (bytes_total, bytes_downloaded, bytes_per_second)
+
+        now = time.monotonic()
+        if now - DownloadJob.last_progress >= output.PROGRESS_INTERVAL:
+            DownloadJob.last_progress = now
+            DownloadJob.flush_progress()
+
+    @classmethod
+    def flush_progress(cls):
+        """Send the latest progress update if it has not been sent yet."""
+        if cls.pipe_handler is not None and cls.pending_progress is not None:
+            cls.pipe_handler.send({"progress": cls.pending_progress})
+            cls.pending_progress = None
+
+    def success(self, path: str):
+        """Count a successfully downloaded file before reporting it."""
+        DownloadJob.flush_progress()
+        DownloadJob.files += 1
+        try:
+            DownloadJob.bytes += os.path.getsize(path)
+        except OSError:
+            pass
+
+        self.out_success(path)
@@ -0,0 +1,862 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import math
+import os
+import signal
+import threading
+import time
+
+from collections import Counter, OrderedDict, deque
+from multiprocessing import connection as mp_connection
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Awaitable, Callable, Iterable
+from urllib.parse import urlsplit
+
+from gallery_dl import extractor
+
+from . import metrics, output, store, utils
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+RESUMING = "resuming"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+KILL_TIMEOUT = 5.0
+WATCHDOG_INTERVAL = 1.0
+SUBSCRIBER_QUEUE_SIZE = 100
+
+GENERIC_CATEGORIES = {"directlink", "generic", "ytdl"}
+
+JOBS_SUBMITTED = metrics.Counter(
+    "gallery_dl_server_jobs_submitted", "Download jobs added to the queue"
+)
+JOBS_FINISHED = metrics.Counter(
+    "gallery_dl_server_jobs_finished", "Download jobs finished by final status", ("status",)
+)
+JOB_EXIT_CODES = metrics.Counter(
+    "gallery_dl_server_job_exit_codes", "Exit codes of finished download jobs", ("code",)
+)
+JOB_QUEUE_WAIT = metrics.Histogram(
+    "gallery_dl_server_job_queue_wait_seconds",
+    "Time download jobs waited in the queue before starting",
+    metrics.DURATION_BUCKETS,
+)
+JOB_DURATION = metrics.Histogram(
+    "gallery_dl_server_job_duration_seconds",
+    "Time download jobs spent running, not counting pauses",
+    metrics.DURATION_BUCKETS,
+)
+DOWNLOADED_FILES = metrics.Counter("gallery_dl_server_downloaded_files", "Files downloaded")
+DOWNLOADED_BYTES = metrics.Counter("gallery_dl_server_downloaded_bytes", "Bytes downloaded")
+
+CATEGORY_CACHE_SIZE = 4096
+
+categories: OrderedDict[str, str | None] = OrderedDict()
+categories_lock = threading.Lock()
+
+log = output.initialise_logging(__name__)
+
+
+def get_key(url: str, options: dict[str, Any]):
+    """Return the key used to detect identical submissions."""
+    return utils.normalise_url(url) + " " + json.dumps(options, sort_keys=True)
+
+
+def get_host(url: str):
+    """Return the key used to group jobs for the same site.
+
+    This is the gallery-dl extractor category for supported sites,
+    otherwise the hostname of the URL.
+    """
+    hostname = urlsplit(url).hostname or ""
+    if hostname.startswith("www."):
+        hostname = hostname[4:]
+
+    return find_category(hostname, url) or hostname
+
+
+def get_hosts(urls: list[str]):
+    """Return the hosts of many URLs, e.g. in a thread before queueing a batch."""
+    return [get_host(url) for url in urls]
+
+
+def find_category(hostname: str, url: str):
+    """Return the extractor category for a hostname, using the first URL seen for it.
+
+    Finding the extractor takes about a millisecond, so the categories of the last
+    `CATEGORY_CACHE_SIZE` hostnames are kept. This is safe to call from threads.
+    """
+    with categories_lock:
+        if hostname in categories:
+            categories.move_to_end(hostname)
+            return categories[hostname]
+
+        try:
+            extr = extractor.find(url)
+        except Exception as e:
+            log.debug(f"Exception: {type(e).__name__}: {e}")
+            extr = None
+
+        category = None
+        if extr is not None and extr.category not in GENERIC_CATEGORIES:
+            category = extr.category
+
+        categories[hostname] = category
+        if len(categories) > CATEGORY_CACHE_SIZE:
+            categories.popitem(last=False)
+
+        return category
+
+
+class Job:
+    """Download job tracked by the scheduler."""
+
+    __slots__ = (
+        "id",
+        "url",
+        "key",
+        "host",
+        "options",
+        "status",
+        "created",
+        "started",
+        "finished",
+        "exit_code",
+        "files",
+        "bytes",
+        "error",
+        "last_activity",
+        "paused_at",
+        "paused_time",
+        "progress",
+        "process",
+    )
+
+    def __init__(
+        self,
+        job_id: int,
+        url: str,
+        options: dict[str, Any],
+        created: float,
+        host: str | None = None,
+    ):
+        self.id = job_id
+        self.url = url
+        self.key = get_key(url, options)
+        self.host = get_host(url) if host is None else host
+        self.options = options
+        self.status = QUEUED
+        self.created = created
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.exit_code: int | None = None
+        self.files = 0
+        self.bytes = 0
+        self.error: str | None = None
+        self.last_activity = 0.0
+        self.paused_at: float | None = None
+        self.paused_time = 0.0
+        self.progress: dict[str, Any] | None = None
+        self.process: BaseProcess | None = None
+
+    def __repr__(self):
+        return f"<{type(self).__name__} id={self.id} status={self.status} url={self.url!r}>"
+
+    def set_progress(self, total: int | None, downloaded: int, speed: int):
+        """Update the progress of the file currently being downloaded."""
+        eta = None
+        if total and speed:
+            eta = max(total - downloaded, 0) / speed
+
+        self.progress = {
+            "bytes": downloaded,
+            "total": total,
+            "speed": speed,
+            "eta": eta,
+        }
+
+    def elapsed(self, now: float | None = None):
+        """Return the number of seconds the job has been running for, not counting pauses."""
+        if self.started is None:
+            return 0.0
+
+        if now is None:
+            now = time.time()
+
+        paused_time = self.paused_time
+        if self.paused_at is not None:
+            paused_time += now - self.paused_at
+
+        return now - self.started - paused_time
+
+    def to_dict(self):
+        """Return the live state of the job."""
+        return {
+            "id": self.id,
+            "url": self.url,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """Run queued download jobs with a fixed number of worker slots.
+
+    Jobs are started in submission order, except that a job waits while its host
+    already has `host_max_workers` jobs running or started one less than
+    `host_delay` seconds ago. Jobs for other hosts are started in the meantime.
+
+    A submission identical to a queued or running job, or to a job that completed
+    successfully less than `dedupe_ttl` seconds ago, is not queued again.
+
+    Cancelling or pausing a running job releases its worker slot immediately.
+    A resumed job waits for a free worker slot and takes priority over the backlog.
+
+    A running job is terminated and marked as failed if it runs for longer than
+    `job_timeout` seconds, reports no activity for `stall_timeout` seconds or its
+    process uses more than `memory_limit` MiB of memory.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[Job], Awaitable[int | None]],
+        max_workers: int,
+        job_store: store.JobStore,
+        host_max_workers: int = 0,
+        host_delay: float = 0.0,
+        dedupe_ttl: float = 0.0,
+        job_timeout: float = 0.0,
+        stall_timeout: float = 0.0,
+        memory_limit: int = 0,
+    ):
+        self.target = target
+        self.max_workers = max_workers
+        self.store = job_store
+        self.host_max_workers = host_max_workers
+        self.host_delay = host_delay
+        self.dedupe_ttl = dedupe_ttl
+        self.job_timeout = job_timeout
+        self.stall_timeout = stall_timeout
+        self.memory_limit = memory_limit * 1024 * 1024
+        self.jobs: dict[int, Job] = {}
+        self.active: dict[str, Job] = {}
+        self.recent: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self.backlog: dict[str, deque[Job]] = {}
+        self.running: dict[int, Job] = {}
+        self.paused: dict[int, Job] = {}
+        self.resuming: deque[Job] = deque()
+        self.host_running: Counter[str] = Counter()
+        self.host_started: dict[str, float] = {}
+        self.timer: asyncio.TimerHandle | None = None
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.watchdog_task: asyncio.Task | None = None
+        self.tasks: set[asyncio.Task] = set()
+        self.subscribers: set[asyncio.Queue[dict[str, Any]]] = set()
+
+    async def submit(self, url: str, options: dict[str, Any]):
+        """Save a new job and add it to the end of the backlog.
+
+        Returns the job ID and whether it belongs to an existing identical job instead.
+        """
+        key = get_key(url, options)
+        host = None
+
+        duplicate = self.find_duplicate(key)
+        if duplicate is None:
+            host = await asyncio.to_thread(get_host, url)
+            # an identical job may have been submitted in the meantime
+            duplicate = self.find_duplicate(key)
+
+        if duplicate is not None:
+            log.debug(f"Coalesced submission with job {duplicate}")
+            return duplicate, True
+
+        created = time.time()
+        job_id = self.store.insert(url, options, QUEUED, created)
+        job = Job(job_id, url, options, created, host)
+
+        self.enqueue(job)
+        JOBS_SUBMITTED.inc()
+
+        log.debug(f"Queued job {job.id} ({self.queued} waiting, {len(self.running)} running)")
+
+        return job.id, False
+
+    async def submit_many(self, urls: Iterable[str], options: dict[str, Any]):
+        """Save new jobs for all URLs in a single transaction.
+
+        The hosts of the URLs are found in a thread before the transaction is opened,
+        so neither the event loop nor the database is blocked meanwhile.
+
+        Returns the job IDs in order, with the IDs of existing identical jobs
+        in place of duplicates, and the number of duplicates.
+        """
+        urls = list(urls)
+        new = [url for url in urls if self.find_duplicate(get_key(url, options)) is None]
+        hosts = dict(zip(new, await asyncio.to_thread(get_hosts, new)))
+
+        created = time.time()
+        ids: list[int] = []
+        batch: list[Job] = []
+
+        with self.store.transaction():
+            for url in urls:
+                duplicate = self.find_duplicate(get_key(url, options))
+                if duplicate is not None:
+                    ids.append(duplicate)
+                    continue
+
+                job_id = self.store.insert(url, options, QUEUED, created)
+                batch.append(Job(job_id, url, options, created, hosts.get(url)))
+                ids.append(job_id)
+
+        for job in batch:
+            self.enqueue(job)
+
+        JOBS_SUBMITTED.inc(len(batch))
+
+        log.debug(f"Queued {len(batch)} jobs ({self.queued} waiting, {len(self.running)} running)")
+
+        return ids, len(ids) - len(batch)
+
+    def find_duplicate(self, key: str):
+        """Return the ID of an active or recently completed job with the same key."""
+        if key in self.active:
+            return self.active[key].id
+
+        expiry = time.monotonic() - self.dedupe_ttl
+        while self.recent:
+            oldest = next(iter(self.recent.values()))
+            if oldest[1] > expiry:
+                break
+            self.recent.popitem(last=False)
+
+        if key in self.recent:
+            return self.recent[key][0]
+
+        return None
+
+    def enqueue(self, job: Job):
+        """Add a job to the end of the backlog for its host."""
+        self.jobs[job.id] = job
+        self.active[job.key] = job
+        self.backlog.setdefault(job.host, deque()).append(job)
+        self.wakeup.set()
+
+    @property
+    def queued(self):
+        """Return the number of jobs waiting in the backlog."""
+        return sum(len(jobs) for jobs in self.backlog.values())
+
+    def queue_age(self):
+        """Return the number of seconds the oldest job in the backlog has been waiting."""
+        if not self.backlog:
+            return 0.0
+
+        return max(time.time() - min(jobs[0].created for jobs in self.backlog.values()), 0.0)
+
+    def start(self):
+        """Queue unfinished jobs from a previous run and start dispatching jobs."""
+        unfinished = self.store.unfinished((QUEUED, RUNNING, PAUSED, RESUMING, INTERRUPTED))
+        jobs: list[Job] = []
+
+        with self.store.transaction():
+            for row in unfinished:
+                job = Job(row["id"], row["url"], row["options"], row["created"])
+                if job.key not in self.active:
+                    jobs.append(job)
+                    self.enqueue(job)
+
+            for job in jobs:
+                self.store.update(
+                    job.id,
+                    status=QUEUED,
+                    started=None,
+                    finished=None,
+                    exit_code=None,
+                    error=None,
+                )
+
+        if jobs:
+            log.info(f"Restored {len(jobs)} unfinished job(s) from a previous run")
+
+        if self.task is None:
+            self.task = asyncio.create_task(self.dispatch())
+
+        if self.watchdog_task is None and (
+            self.job_timeout or self.stall_timeout or self.memory_limit
+        ):
+            self.watchdog_task = asyncio.create_task(self.watchdog())
+
+    async def stop(self):
+        """Stop dispatching new jobs and checking the limits of running jobs."""
+        for task in (self.task, self.watchdog_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+        self.task = self.watchdog_task = None
+
+    async def drain(self, timeout: float):
+        """Stop starting jobs and give running jobs time to finish.
+
+        Jobs that are still running after the timeout, or right away if it is 0, are
+        terminated and marked as interrupted, so they are queued again along with the
+        rest of the backlog the next time the scheduler starts.
+        """
+        await self.stop()
+
+        interrupted = [*self.paused.values(), *self.resuming]
+        for job in interrupted:
+            job.status = INTERRUPTED
+            terminate_process(job.process, timeout=None)
+
+        self.paused.clear()
+        self.resuming.clear()
+
+        if self.running and timeout > 0:
+            log.info(f"Waiting up to {timeout:g}s for {len(self.running)} download(s) to finish")
+
+            await asyncio.wait(self.tasks, timeout=timeout)
+
+        for job in list(self.running.values()):
+            log.warning(
+                f"Interrupted job {job.id}, it will be restarted on the next startup",
+                extra={"job_id": job.id},
+            )
+
+            job.status = INTERRUPTED
+            terminate_process(job.process, timeout=None)
+            interrupted.append(job)
+
+        if self.tasks:
+            await asyncio.wait(self.tasks, timeout=KILL_TIMEOUT)
+
+            for job in interrupted:
+                kill_process(job.process)
+
+    async def dispatch(self):
+        """Start jobs from the backlog whenever a worker slot is free."""
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+
+            while len(self.running) < self.max_workers:
+                if self.resuming:
+                    self.continue_job(self.resuming.popleft())
+                    continue
+
+                job = self.next_job()
+                if job is None:
+                    break
+
+                self.acquire(job)
+                self.host_started[job.host] = time.monotonic()
+                self.start_job(job)
+
+                task = asyncio.create_task(self.run_job(job))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+    async def watchdog(self):
+        """Periodically check running jobs against the configured limits."""
+        while True:
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+
+            for job in list(self.running.values()):
+                error = self.check_limits(job)
+                if error is not None:
+                    self.fail(job, error)
+
+    def check_limits(self, job: Job):
+        """Return the reason a running job exceeds a limit, or None if it does not."""
+        if job.process is None or job.started is None:
+            return None
+
+        if self.job_timeout and job.elapsed() > self.job_timeout:
+            return f"Exceeded the time limit of {self.job_timeout:g}s"
+
+        if self.stall_timeout and time.monotonic() - job.last_activity > self.stall_timeout:
+            return f"No progress for {self.stall_timeout:g}s"
+
+        if self.memory_limit and job.process.pid is not None:
+            rss = utils.get_rss(job.process.pid)
+            if rss is not None and rss > self.memory_limit:
+                limit = self.memory_limit // (1024 * 1024)
+                return f"Exceeded the memory limit of {limit} MiB ({rss // (1024 * 1024)} MiB used)"
+
+        return None
+
+    def fail(self, job: Job, error: str):
+        """Terminate a running job that exceeded a limit and mark it as failed."""
+        job.status = FAILED
+        job.error = error
+
+        log.error(f"Stopping job {job.id}: {error}", extra={"job_id": job.id})
+
+        terminate_process(job.process)
+
+    def next_job(self):
+        """Remove and return the oldest job whose host is free to start another download.
+
+        If jobs are only held back by the host delay, schedule a wakeup for when
+        the first of them becomes ready.
+        """
+        now = time.monotonic()
+        ready: deque[Job] | None = None
+        wait = math.inf
+
+        for host, jobs in self.backlog.items():
+            if self.host_max_workers and self.host_running[host] >= self.host_max_workers:
+                continue
+
+            if host in self.host_started:
+                remaining = self.host_started[host] + self.host_delay - now
+                if remaining > 0:
+                    wait = min(wait, remaining)
+                    continue
+
+            if ready is None or jobs[0].id < ready[0].id:
+                ready = jobs
+
+        if ready is None:
+            if wait < math.inf:
+                self.schedule_wakeup(wait)
+            return None
+
+        job = ready.popleft()
+        if not ready:
+            del self.backlog[job.host]
+
+        return job
+
+    def acquire(self, job: Job):
+        """Take a worker slot for a job."""
+        self.running[job.id] = job
+        self.host_running[job.host] += 1
+
+    def release(self, job: Job):
+        """Give back the worker slot of a job if it holds one."""
+        if self.running.pop(job.id, None) is None:
+            return
+
+        self.host_running[job.host] -= 1
+        if not self.host_running[job.host]:
+            del self.host_running[job.host]
+
+        self.wakeup.set()
+
+    def cancel(self, job_id: int):
+        """Cancel a queued, running, paused or resuming job and return whether it was.
+
+        Jobs that already have a final status, e.g. failed jobs that are still exiting
+        after exceeding a limit, are left as they are.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in (QUEUED, RUNNING, PAUSED, RESUMING):
+            return False
+
+        if job.status == QUEUED:
+            jobs = self.backlog[job.host]
+            jobs.remove(job)
+            if not jobs:
+                del self.backlog[job.host]
+
+            job.status = CANCELLED
+            self.finish(job)
+            return True
+
+        job.status = CANCELLED
+        self.paused.pop(job.id, None)
+        if job in self.resuming:
+            self.resuming.remove(job)
+
+        self.release(job)
+        self.forget(job)
+        self.store.update(job.id, status=job.status)
+        self.publish(job)
+
+        terminate_process(job.process)
+
+        log.info(f"Cancelled job {job.id}", extra={"job_id": job.id})
+        return True
+
+    def pause(self, job_id: int):
+        """Suspend a running job and return whether it was paused."""
+        job = self.running.get(job_id)
+        if job is None or job.process is None or utils.WINDOWS:
+            return False
+
+        signal_process(job.process, signal.SIGSTOP)
+
+        job.status = PAUSED
+        job.paused_at = time.time()
+        self.paused[job.id] = job
+        self.release(job)
+        self.store.update(job.id, status=job.status)
+        self.publish(job)
+
+        log.info(f"Paused job {job.id}", extra={"job_id": job.id})
+        return True
+
+    def resume(self, job_id: int):
+        """Resume a paused job once a worker slot is free and return whether it was paused.
+
+        The job has the status `resuming` until it continues.
+        """
+        job = self.paused.pop(job_id, None)
+        if job is None:
+            return False
+
+        job.status = RESUMING
+        self.resuming.append(job)
+        self.store.update(job.id, status=job.status)
+        self.publish(job)
+
+        self.wakeup.set()
+        return True
+
+    def continue_job(self, job: Job):
+        """Continue a paused job in a free worker slot."""
+        self.acquire(job)
+
+        if job.process is not None:
+            signal_process(job.process, signal.SIGCONT)
+
+        job.status = RUNNING
+        job.last_activity = time.monotonic()
+        if job.paused_at is not None:
+            job.paused_time += time.time() - job.paused_at
+            job.paused_at = None
+
+        self.store.update(job.id, status=job.status)
+        self.publish(job)
+
+        log.info(f"Resumed job {job.id}", extra={"job_id": job.id})
+
+    def finish(self, job: Job):
+        """Record the final state of a job and forget about it."""
+        job.finished = time.time()
+
+        self.store.update(
+            job.id,
+            status=job.status,
+            finished=job.finished,
+            exit_code=job.exit_code,
+            files=job.files,
+            bytes=job.bytes,
+            error=job.error,
+        )
+        self.publish(job)
+
+        self.release(job)
+        self.jobs.pop(job.id, None)
+        self.forget(job)
+
+        if self.dedupe_ttl and job.status == DONE and job.exit_code == 0:
+            self.recent[job.key] = (job.id, time.monotonic())
+
+        JOBS_FINISHED.inc(labelvalues=(job.status,))
+        DOWNLOADED_FILES.inc(job.files)
+        DOWNLOADED_BYTES.inc(job.bytes)
+
+        if job.exit_code is not None:
+            JOB_EXIT_CODES.inc(labelvalues=(str(job.exit_code),))
+
+        if job.started is not None:
+            JOB_DURATION.observe(job.elapsed(job.finished))
+
+    def forget(self, job: Job):
+        """Stop treating a job as active, so its URL can be submitted again."""
+        if self.active.get(job.key) is job:
+            del self.active[job.key]
+
+    def subscribe(self):
+        """Return a queue that receives the state of a job whenever it changes."""
+        events: asyncio.Queue[dict[str, Any]] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(events)
+        return events
+
+    def unsubscribe(self, events: asyncio.Queue[dict[str, Any]]):
+        """Stop sending job updates to a queue."""
+        self.subscribers.discard(events)
+
+    def publish(self, job: Job):
+        """Send the state of a job to all subscribers.
+
+        If a subscriber falls behind, its oldest update is dropped.
+        """
+        event = job.to_dict()
+
+        for events in self.subscribers:
+            if events.full():
+                events.get_nowait()
+            events.put_nowait(event)
+
+    def update_progress(self, job: Job, total: int | None, downloaded: int, speed: int):
+        """Record the download progress of a running job and publish it."""
+        job.set_progress(total, downloaded, speed)
+        self.publish(job)
+
+    def snapshot(self):
+        """Return the state of all running, paused and resuming jobs."""
+        jobs = [*self.running.values(), *self.paused.values(), *self.resuming]
+        return [job.to_dict() for job in sorted(jobs, key=lambda job: job.id)]
+
+    def schedule_wakeup(self, delay: float):
+        """Wake up the dispatcher after a delay."""
+        if self.timer is not None:
+            self.timer.cancel()
+
+        self.timer = asyncio.get_running_loop().call_later(delay, self.wakeup.set)
+
+    def start_job(self, job: Job):
+        """Mark a job taken from the backlog as running.
+
+        This happens before its task is scheduled, so a job that is cancelled in the
+        meantime is treated as running rather than looked for in the backlog.
+        """
+        job.status = RUNNING
+        job.started = time.time()
+        job.last_activity = time.monotonic()
+        JOB_QUEUE_WAIT.observe(max(job.started - job.created, 0.0))
+
+        self.store.update(job.id, status=job.status, started=job.started)
+        self.publish(job)
+
+    async def run_job(self, job: Job):
+        """Run a started job and release its slot when done."""
+        try:
+            # the job may have been cancelled before its task got to run
+            if job.status == RUNNING:
+                job.exit_code = await self.target(job)
+        except Exception as e:
+            job.exit_code = -1
+            log.error(f"Exception: {type(e).__name__}: {e}")
+        finally:
+            if job.status == RUNNING:
+                job.status = DONE
+
+            job.process = None
+            self.finish(job)
+
+
+async def watch_process(
+    process: BaseProcess,
+    connection: Connection,
+    handle: Callable[[Any], None],
+):
+    """Pass each message received from a download process to `handle` until it exits.
+
+    The pipe and the exit sentinel of the process are watched by the event loop,
+    so running downloads do not need a thread each. Returns once the process has
+    exited and all its messages have been handled.
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    pending = {connection.fileno(), process.sentinel}
+
+    def finished(fd: int):
+        loop.remove_reader(fd)
+        pending.discard(fd)
+        if not pending and not done.done():
+            done.set_result(None)
+
+    def read():
+        while connection.poll():
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                finished(connection.fileno())
+                return
+            handle(message)
+
+    try:
+        loop.add_reader(connection.fileno(), read)
+        loop.add_reader(process.sentinel, finished, process.sentinel)
+    except NotImplementedError:
+        # the proactor event loop on Windows cannot watch pipes
+        await asyncio.to_thread(wait_process, process, connection, handle)
+        return
+
+    try:
+        await done
+    finally:
+        for fd in list(pending):
+            loop.remove_reader(fd)
+
+
+def wait_process(process: BaseProcess, connection: Connection, handle: Callable[[Any], None]):
+    """Blocking version of `watch_process` for event loops that cannot watch pipes."""
+    pending: list[Any] = [connection, process.sentinel]
+
+    while pending:
+        for ready in mp_connection.wait(pending):
+            if ready is not connection:
+                pending.remove(ready)
+                continue
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                pending.remove(connection)
+                continue
+            handle(message)
+
+
+def signal_process(process: BaseProcess, sig: int):
+    """Send a signal to the process group of a download process.
+
+    Falls back to the process itself if it has not started its own group yet.
+    """
+    if process.pid is None:
+        return
+
+    try:
+        os.killpg(process.pid, sig)
+    except OSError:
+        try:
+            os.kill(process.pid, sig)
+        except OSError:
+            pass
+
+
+def terminate_process(process: BaseProcess | None, timeout: float | None = KILL_TIMEOUT):
+    """Terminate a download process and its children.
+
+    If `timeout` is set, they are killed if they are still alive after that many seconds.
+    """
+    if process is None:
+        return
+
+    if utils.WINDOWS:
+        process.terminate()
+        return
+
+    signal_process(process, signal.SIGTERM)
+    signal_process(process, signal.SIGCONT)
+
+    if timeout is not None:
+        asyncio.get_running_loop().call_later(timeout, kill_process, process)
+
+
+def kill_process(process: BaseProcess | None):
+    """Kill a download process and its children if it is still alive."""
+    if process is None or not process.is_alive():
+        return
+
+    if utils.WINDOWS:
+        process.kill()
+    else:
+        signal_process(process, signal.SIGKILL)
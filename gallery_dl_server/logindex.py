@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import itertools
+import os
+import re
+import threading
+
+from typing import BinaryIO
+
+CHUNK_SIZE = 1024 * 1024
+MARKER_SIZE = 64
+NEWLINE = re.compile(rb"\n")
+
+
+class LineIndex:
+    """Sparse index of line offsets in a growing log file.
+
+    The byte offset of every `interval`-th line is recorded, so any line can be found
+    by reading at most `interval` lines from the nearest checkpoint. The index is
+    extended with the new part of the file on every lookup and rebuilt when the file
+    is rotated or cleared. Only complete lines are indexed and returned.
+
+    A file that was cleared and has grown past its previous size since the last lookup
+    is recognised by the bytes before the end of the indexed part no longer matching.
+    """
+
+    def __init__(self, path: str, interval=1000):
+        self.path = path
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, identity: tuple[int, int] | None = None):
+        """Forget all indexed lines."""
+        self.identity = identity
+        self.checkpoints = [0]
+        self.lines = 0
+        self.end = 0
+        self.scanned = 0
+        self.marker = b""
+
+    def refresh(self, file: BinaryIO):
+        """Index the lines added to the file since the last lookup.
+
+        The file is scanned up to its current size, but only complete lines are indexed,
+        so a line longer than a chunk is indexed once its end has been written.
+        """
+        stat = os.fstat(file.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+
+        if (
+            identity != self.identity
+            or stat.st_size < self.scanned
+            or self.read_marker(file) != self.marker
+        ):
+            self.reset(identity)
+
+        offset = self.scanned
+
+        while offset < stat.st_size:
+            file.seek(offset)
+            chunk = file.read(min(CHUNK_SIZE, stat.st_size - offset))
+            if not chunk:
+                break
+
+            newlines = NEWLINE.finditer(chunk)
+            position = 0
+
+            while True:
+                needed = self.interval - self.lines % self.interval
+                match = next(itertools.islice(newlines, needed - 1, None), None)
+                if match is None:
+                    break
+
+                position = match.end()
+                self.lines += needed
+                self.checkpoints.append(offset + position)
+
+            self.lines += chunk.count(b"\n", position)
+
+            last = chunk.rfind(b"\n") + 1
+            if last:
+                self.end = offset + last
+
+            offset += len(chunk)
+
+        self.scanned = offset
+        self.marker = self.read_marker(file)
+
+    def read_marker(self, file: BinaryIO):
+        """Return the bytes before the end of the indexed part of the file."""
+        start = max(self.end - MARKER_SIZE, 0)
+        file.seek(start)
+        return file.read(self.end - start)
+
+    def offset_of(self, file: BinaryIO, line: int):
+        """Return the byte offset at which a line starts."""
+        if line >= self.lines:
+            return self.end
+
+        checkpoint = line // self.interval
+        file.seek(self.checkpoints[checkpoint])
+
+        for _ in range(line - checkpoint * self.interval):
+            file.readline()
+
+        return file.tell()
+
+    def line_at(self, file: BinaryIO, offset: int):
+        """Return the number of the first line starting at or after a byte offset."""
+        if offset >= self.end:
+            return self.lines
+
+        checkpoint = bisect.bisect_right(self.checkpoints, offset) - 1
+        line = checkpoint * self.interval
+
+        file.seek(self.checkpoints[checkpoint])
+        position = file.tell()
+
+        while position < offset:
+            position += len(file.readline())
+            line += 1
+
+        return line
+
+    def read(self, file: BinaryIO, first: int, last: int):
+        """Return lines `first` to `last` (exclusive) with their start and end offsets."""
+        start = self.offset_of(file, first)
+        end = self.offset_of(file, last)
+
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8", errors="replace")
+
+        return {"lines": text, "start": start, "end": end, "size": self.end}
+
+    def tail(self, count: int):
+        """Return the last `count` lines."""
+        with self.lock, open(self.path, "rb") as file:
+            self.refresh(file)
+            return self.read(file, max(self.lines - count, 0), self.lines)
+
+    def before(self, offset: int, count: int):
+        """Return up to `count` lines ending before a byte offset."""
+        with self.lock, open(self.path, "rb") as file:
+            self.refresh(file)
+            last = self.line_at(file, offset)
+            return self.read(file, max(last - count, 0), last)
+
+    def after(self, offset: int, count: int):
+        """Return up to `count` lines starting at or after a byte offset."""
+        with self.lock, open(self.path, "rb") as file:
+            self.refresh(file)
+            first = self.line_at(file, offset)
+            return self.read(file, first, min(first + count, self.lines))
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+
+from typing import Any
+
+import aiofiles
+
+from . import output
+
+log = output.initialise_logging(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+CATCH_UP_MAX = 1024 * 1024
+
+Chunk = dict[str, Any]
+
+
+class LogTailer:
+    """Follow the log file in a single task and send new lines to all subscribers.
+
+    Each chunk carries the byte offsets of its lines in the log file, so a client that
+    reconnects can ask for everything after the last offset it received. Only complete
+    lines are sent.
+
+    The task runs while there are subscribers. Each subscriber has a bounded queue;
+    a subscriber that falls so far behind that its queue is full is dropped and
+    receives `None`, so it cannot hold up the others.
+    """
+
+    def __init__(self, path: str, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.path = path
+        self.queue_size = queue_size
+        self.subscribers: set[asyncio.Queue[Chunk | None]] = set()
+        self.task: asyncio.Task[None] | None = None
+        self.stop_event = asyncio.Event()
+        self.closed = False
+        self.position = 0
+        self.identity: tuple[int, int] | None = None
+
+    def subscribe(self):
+        """Return a queue that receives new lines as they are written to the log file.
+
+        The first chunk the queue receives starts at the current `position`.
+        """
+        chunks: asyncio.Queue[Chunk | None] = asyncio.Queue(self.queue_size)
+
+        if self.closed:
+            chunks.put_nowait(None)
+            return chunks
+
+        self.subscribers.add(chunks)
+
+        if self.task is None:
+            try:
+                stat = os.stat(self.path)
+                self.position, self.identity = stat.st_size, (stat.st_dev, stat.st_ino)
+            except OSError:
+                self.position, self.identity = 0, None
+
+            # awatch() sets its stop event when cancelled, so each task gets its own
+            self.stop_event = asyncio.Event()
+            self.task = asyncio.create_task(self.run(self.stop_event))
+
+        return chunks
+
+    def unsubscribe(self, chunks: asyncio.Queue[Chunk | None]):
+        """Stop sending lines to a queue, and stop following the file if it was the last one."""
+        self.subscribers.discard(chunks)
+
+        if not self.subscribers and self.task is not None:
+            self.stop_event.set()
+            self.task = None
+
+    def close(self):
+        """Stop following the log file and end all subscriptions, e.g. on shutdown."""
+        self.closed = True
+        self.stop_event.set()
+
+    def publish(self, chunk: Chunk | None):
+        """Send a chunk to all subscribers, dropping any whose queue is full."""
+        for chunks in list(self.subscribers):
+            if chunks.full():
+                self.subscribers.discard(chunks)
+                chunks.get_nowait()
+                chunks.put_nowait(None)
+                log.debug("Dropped log subscriber that fell behind")
+            else:
+                chunks.put_nowait(chunk)
+
+    async def run(self, stop_event: asyncio.Event):
+        """Follow the log file until there are no subscribers or the tailer is closed."""
+        try:
+            await self.follow(stop_event)
+        except Exception as e:
+            log.debug(f"Exception: {type(e).__name__}: {e}")
+
+        if self.task is not asyncio.current_task():
+            return
+
+        for chunks in self.subscribers:
+            if chunks.full():
+                chunks.get_nowait()
+            chunks.put_nowait(None)
+
+        self.subscribers.clear()
+        self.task = None
+
+    async def follow(self, stop_event: asyncio.Event):
+        """Read new lines from the log file whenever it changes and publish them."""
+        import watchfiles
+
+        file = await aiofiles.open(self.path, mode="rb")
+        try:
+            self.identity = get_identity(os.fstat(file.fileno()))
+            await file.seek(self.position)
+            pending = b""
+
+            async for changes in watchfiles.awatch(
+                os.path.dirname(self.path),
+                stop_event=stop_event,
+                recursive=False,
+                rust_timeout=100,
+                yield_on_timeout=True,
+            ):
+                data = await file.read()
+
+                if not data and await self.replaced(file):
+                    await file.close()
+                    file = await aiofiles.open(self.path, mode="rb")
+                    self.identity = get_identity(os.fstat(file.fileno()))
+                    self.position = 0
+                    pending = b""
+                    data = await file.read()
+
+                if stop_event.is_set():
+                    break
+
+                data = pending + data
+                end = data.rfind(b"\n") + 1
+                pending = data[end:]
+
+                if end:
+                    start, self.position = self.position, self.position + end
+                    self.publish(make_chunk(start, self.position, data[:end]))
+        finally:
+            await file.close()
+
+    async def replaced(self, file: Any):
+        """Return whether the log file was rotated or cleared since the file was opened."""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        opened = os.fstat(file.fileno())
+
+        return not os.path.samestat(current, opened) or current.st_size < await file.tell()
+
+    def rotated_since(self, offset: int):
+        """Return whether an offset a client received refers to an earlier log file.
+
+        This is the case if the file was replaced or is now shorter than the offset.
+        An offset past `position` alone is not, as the tailer lags behind the file.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+
+        return get_identity(stat) != self.identity or offset > stat.st_size
+
+    async def read(self, since: int, until: int):
+        """Return the lines between two offsets, e.g. those a reconnecting client missed.
+
+        If `since` is past `until`, the file was rotated or cleared and it is read from the
+        start. At most `CATCH_UP_MAX` bytes are returned, skipping older lines.
+        """
+        if since > until:
+            since = 0
+
+        return await asyncio.to_thread(self.read_range, max(since, until - CATCH_UP_MAX), until)
+
+    def read_range(self, start: int, end: int):
+        """Read the lines between two offsets, starting at the first complete line."""
+        with open(self.path, "rb") as file:
+            if start > 0:
+                file.seek(start - 1)
+                file.readline()
+                start = file.tell()
+
+            data = file.read(max(end - start, 0))
+
+        return make_chunk(start, start + len(data), data)
+
+
+class Subscription:
+    """New lines of the log file for a client that already has the lines up to `since`.
+
+    `catch_up()` returns the lines the client has missed before the first queued chunk.
+    If the client is ahead of the tailer, e.g. because it got its offset from a page of
+    lines, the lines it already has are left out of the queued chunks instead.
+    """
+
+    def __init__(self, tailer: LogTailer, since: int | None = None):
+        self.tailer = tailer
+        self.since = since
+        self.chunks = tailer.subscribe()
+        self.position = tailer.position
+        self.skip_until = 0
+
+    async def catch_up(self):
+        """Return the lines written between `since` and the first queued chunk, or None."""
+        since, position = self.since, self.position
+
+        if since is None or since == position:
+            return None
+
+        if since > position and not self.tailer.rotated_since(since):
+            self.skip_until = since
+            return None
+
+        missed = await self.tailer.read(max(since, 0), position)
+        return missed if missed["lines"] else None
+
+    async def get(self):
+        """Return the next chunk of new lines, or None once the subscription has ended."""
+        while True:
+            chunk = await self.chunks.get()
+            if chunk is None:
+                return None
+
+            # offsets going back mean the file was rotated, so nothing more is skipped
+            if chunk["start"] < self.position:
+                self.skip_until = 0
+            self.position = chunk["end"]
+
+            chunk = trim_chunk(chunk, self.skip_until)
+            if chunk is not None:
+                return chunk
+
+    def close(self):
+        """Stop receiving new lines."""
+        self.tailer.unsubscribe(self.chunks)
+
+
+def get_identity(stat: os.stat_result):
+    """Return the device and inode of a file."""
+    return stat.st_dev, stat.st_ino
+
+
+def trim_chunk(chunk: Chunk, offset: int):
+    """Return the part of a chunk after an offset, or None if it ends at or before it."""
+    if chunk["end"] <= offset:
+        return None
+
+    if chunk["start"] >= offset:
+        return chunk
+
+    data = chunk["lines"].encode("utf-8")
+    if len(data) != chunk["end"] - chunk["start"]:
+        # invalid UTF-8 was replaced, so the offsets do not match the text
+        return chunk
+
+    return make_chunk(offset, chunk["end"], data[offset - chunk["start"] :])
+
+
+def make_chunk(start: int, end: int, data: bytes):
+    """Return a chunk of lines with their offsets in the log file."""
+    return {"start": start, "end": end, "lines": data.decode("utf-8", errors="replace")}
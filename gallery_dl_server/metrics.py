@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import math
+
+from typing import Callable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0)
+
+Labels = tuple[str, ...]
+Sample = tuple[str, tuple[tuple[str, str], ...], float]
+
+registry: list["Metric"] = []
+
+
+class Metric:
+    """Base class of metrics that are exposed in the Prometheus text format."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.append(self)
+
+    def samples(self) -> list[Sample]:
+        """Return the name suffix, labels and value of each sample."""
+        raise NotImplementedError
+
+    def render(self):
+        """Return the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {escape(self.documentation, help_text=True)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}")
+
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Value that only increases, optionally split up by labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[Labels, float] = {} if labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, labelvalues: Labels = ()):
+        """Increase the value for the given label values."""
+        self.values[labelvalues] = self.values.get(labelvalues, 0.0) + amount
+
+    def samples(self):
+        return [
+            ("_total", tuple(zip(self.labelnames, labelvalues)), value)
+            for labelvalues, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """Value that is read from a function whenever the metrics are collected."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def samples(self):
+        return [("", (), self.function())]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple[float, ...]):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Add a value to the bucket of the smallest upper bound it does not exceed."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        samples: list[Sample] = []
+        cumulative = 0
+
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            cumulative += count
+            samples.append(("_bucket", (("le", format_value(bound)),), cumulative))
+
+        samples.append(("_sum", (), self.sum))
+        samples.append(("_count", (), cumulative))
+
+        return samples
+
+
+def render():
+    """Return all registered metrics in the Prometheus text format."""
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+def format_labels(labels: tuple[tuple[str, str], ...]):
+    """Return the label set of a sample."""
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}"
+
+
+def format_value(value: float):
+    """Return a sample value, writing whole numbers without a fraction."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def escape(value: str, help_text=False):
+    """Escape a label value or help text."""
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value if help_text else value.replace('"', '\\"')
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import multiprocessing
 import os
 
 from argparse import ArgumentParser, Namespace
@@ -8,6 +9,26 @@ from . import utils
 
 custom_args: "CustomNamespace | None" = None
 
+REQUEST_OPTIONS = [
+    "directory",
+    "filename",
+    "range",
+    "chapter-range",
+    "filter",
+    "chapter-filter",
+    "skip",
+    "sleep",
+    "sleep-request",
+    "rate",
+    "retries",
+    "timeout",
+    "extractor",
+]
+
+DEFAULT_REQUEST_OPTIONS = (
+    "directory,filename,range,chapter-range,skip,sleep,sleep-request,rate,retries,timeout,extractor"
+)
+
 
 def parse_args(is_main_module: bool = False):
     """Parse command-line arguments and return namespace with the correct types."""
@@ -67,6 +88,118 @@ def parse_args(is_main_module: bool = False):
         help="enable server access logging [true|false] (default: false)",
     )
 
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=get_env_int("MAX_WORKERS", 4),
+        help="maximum number of concurrent downloads (default: 4)",
+    )
+
+    parser.add_argument(
+        "--host-max-workers",
+        type=int,
+        default=get_env_int("HOST_MAX_WORKERS", 0),
+        help="maximum number of concurrent downloads per site (default: 0, no limit)",
+    )
+
+    parser.add_argument(
+        "--host-delay",
+        type=float,
+        default=get_env_float("HOST_DELAY", 0.0),
+        help="minimum number of seconds between downloads from the same site (default: 0)",
+    )
+
+    parser.add_argument(
+        "--dedupe-ttl",
+        type=float,
+        default=get_env_float("DEDUPE_TTL", 0.0),
+        help="seconds to ignore resubmissions of a completed download (default: 0)",
+    )
+
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=get_env_float("DRAIN_TIMEOUT", 20.0),
+        help="seconds to let running downloads finish on shutdown (default: 20)",
+    )
+
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        default=get_env_float("JOB_TIMEOUT", 0.0),
+        help="maximum number of seconds a download may run for (default: 0)",
+    )
+
+    parser.add_argument(
+        "--stall-timeout",
+        type=float,
+        default=get_env_float("STALL_TIMEOUT", 0.0),
+        help="seconds without progress before a download is stopped (default: 0)",
+    )
+
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=get_env_int("MEMORY_LIMIT", 0),
+        help="maximum memory usage of a download process in MiB (default: 0)",
+    )
+
+    parser.add_argument(
+        "--progress-rate",
+        type=float,
+        default=get_env_float("PROGRESS_RATE", 4.0),
+        help="maximum number of progress updates per second for each download (default: 4)",
+    )
+
+    parser.add_argument(
+        "--log-max-size",
+        type=int,
+        default=get_env_int("LOG_MAX_SIZE", 10),
+        help="size in MiB at which the log file is rotated (default: 10)",
+    )
+
+    parser.add_argument(
+        "--log-max-age",
+        type=float,
+        default=get_env_float("LOG_MAX_AGE", 0.0),
+        help="age in days at which the log file is rotated (default: 0)",
+    )
+
+    parser.add_argument(
+        "--log-backups",
+        type=int,
+        default=get_env_int("LOG_BACKUPS", 5),
+        help="number of rotated log files to keep (default: 5)",
+    )
+
+    parser.add_argument(
+        "--log-format",
+        type=str,
+        default=os.environ.get("LOG_FORMAT", "text"),
+        help="log file format [text|json] (default: text)",
+    )
+
+    parser.add_argument(
+        "--job-logs",
+        type=str,
+        default=os.environ.get("JOB_LOGS", "false"),
+        help="write a separate log file for each job [true|false] (default: false)",
+    )
+
+    parser.add_argument(
+        "--request-options",
+        type=str,
+        default=os.environ.get("REQUEST_OPTIONS", DEFAULT_REQUEST_OPTIONS),
+        help="comma-separated options that requests may override (default: all except filters)",
+    )
+
+    parser.add_argument(
+        "--start-method",
+        type=str,
+        default=os.environ.get("START_METHOD", "default"),
+        help="download process start method [default|spawn|fork|forkserver] (default: default)",
+    )
+
     args = parser.parse_args()
 
     custom_args = validate_args(parser, args)
@@ -82,6 +215,22 @@ def validate_args(parser: ArgumentParser, args: Namespace):
     log_level: str = args.log_level
     server_log_level: str = args.server_log_level
     access_log: str = args.access_log
+    max_workers: int = args.max_workers
+    host_max_workers: int = args.host_max_workers
+    host_delay: float = args.host_delay
+    dedupe_ttl: float = args.dedupe_ttl
+    drain_timeout: float = args.drain_timeout
+    job_timeout: float = args.job_timeout
+    stall_timeout: float = args.stall_timeout
+    memory_limit: int = args.memory_limit
+    progress_rate: float = args.progress_rate
+    log_max_size: int = args.log_max_size
+    log_max_age: float = args.log_max_age
+    log_backups: int = args.log_backups
+    log_format: str = args.log_format
+    job_logs: str = args.job_logs
+    request_options: str = args.request_options
+    start_method: str = args.start_method
 
     if port < 0 or port > 65535:
         parser.error("invalid value for --port, must be a valid integer between 0 and 65535")
@@ -102,6 +251,54 @@ def validate_args(parser: ArgumentParser, args: Namespace):
     if access_log.lower() not in ["true", "false"]:
         parser.error("invalid value for --access-log, must be 'true' or 'false'")
 
+    if max_workers < 1:
+        parser.error("invalid value for --max-workers, must be a positive integer")
+
+    if host_max_workers < 0:
+        parser.error("invalid value for --host-max-workers, must be 0 or a positive integer")
+
+    if host_delay < 0:
+        parser.error("invalid value for --host-delay, must be 0 or a positive number")
+
+    if dedupe_ttl < 0:
+        parser.error("invalid value for --dedupe-ttl, must be 0 or a positive number")
+
+    if drain_timeout < 0:
+        parser.error("invalid value for --drain-timeout, must be 0 or a positive number")
+
+    if job_timeout < 0:
+        parser.error("invalid value for --job-timeout, must be 0 or a positive number")
+
+    if stall_timeout < 0:
+        parser.error("invalid value for --stall-timeout, must be 0 or a positive number")
+
+    if memory_limit < 0:
+        parser.error("invalid value for --memory-limit, must be 0 or a positive integer")
+
+    if progress_rate < 0:
+        parser.error("invalid value for --progress-rate, must be 0 or a positive number")
+
+    if log_max_size < 0:
+        parser.error("invalid value for --log-max-size, must be 0 or a positive integer")
+
+    if log_max_age < 0:
+        parser.error("invalid value for --log-max-age, must be 0 or a positive number")
+
+    if log_backups < 0:
+        parser.error("invalid value for --log-backups, must be 0 or a positive integer")
+
+    if log_format.lower() not in ["text", "json"]:
+        parser.error("invalid value for --log-format, must be 'text' or 'json'")
+
+    if job_logs.lower() not in ["true", "false"]:
+        parser.error("invalid value for --job-logs, must be 'true' or 'false'")
+
+    if any(name not in REQUEST_OPTIONS for name in split_names(request_options)):
+        parser.error("invalid value for --request-options, use --help to view the valid options")
+
+    if start_method.lower() not in ["default", *multiprocessing.get_all_start_methods()]:
+        parser.error("invalid value for --start-method, not supported on this platform")
+
     return CustomNamespace(
         host=host,
         port=port,
@@ -109,6 +306,22 @@ def validate_args(parser: ArgumentParser, args: Namespace):
         log_level=log_level.lower(),
         server_log_level=server_log_level.lower(),
         access_log=access_log.lower() == "true",
+        max_workers=max_workers,
+        host_max_workers=host_max_workers,
+        host_delay=host_delay,
+        dedupe_ttl=dedupe_ttl,
+        drain_timeout=drain_timeout,
+        job_timeout=job_timeout,
+        stall_timeout=stall_timeout,
+        memory_limit=memory_limit,
+        progress_rate=progress_rate,
+        log_max_size=log_max_size,
+        log_max_age=log_max_age,
+        log_backups=log_backups,
+        log_format=log_format.lower(),
+        job_logs=job_logs.lower() == "true",
+        request_options=split_names(request_options),
+        start_method=start_method.lower(),
     )
 
 
@@ -120,6 +333,22 @@ def get_default_args():
     log_level = os.environ.get("LOG_LEVEL", "info")
     server_log_level = os.environ.get("SERVER_LOG_LEVEL", "info")
     access_log = os.environ.get("ACCESS_LOG", "false")
+    max_workers = get_env_int("MAX_WORKERS", 4)
+    host_max_workers = get_env_int("HOST_MAX_WORKERS", 0)
+    host_delay = get_env_float("HOST_DELAY", 0.0)
+    dedupe_ttl = get_env_float("DEDUPE_TTL", 0.0)
+    drain_timeout = get_env_float("DRAIN_TIMEOUT", 20.0)
+    job_timeout = get_env_float("JOB_TIMEOUT", 0.0)
+    stall_timeout = get_env_float("STALL_TIMEOUT", 0.0)
+    memory_limit = get_env_int("MEMORY_LIMIT", 0)
+    progress_rate = get_env_float("PROGRESS_RATE", 4.0)
+    log_max_size = get_env_int("LOG_MAX_SIZE", 10)
+    log_max_age = get_env_float("LOG_MAX_AGE", 0.0)
+    log_backups = get_env_int("LOG_BACKUPS", 5)
+    log_format = os.environ.get("LOG_FORMAT", "text")
+    job_logs = os.environ.get("JOB_LOGS", "false")
+    request_options = os.environ.get("REQUEST_OPTIONS", DEFAULT_REQUEST_OPTIONS)
+    start_method = os.environ.get("START_METHOD", "default")
 
     return CustomNamespace(
         host=host,
@@ -128,9 +357,46 @@ def get_default_args():
         log_level=log_level.lower(),
         server_log_level=server_log_level.lower(),
         access_log=access_log.lower() == "true",
+        max_workers=max(max_workers, 1),
+        host_max_workers=max(host_max_workers, 0),
+        host_delay=max(host_delay, 0.0),
+        dedupe_ttl=max(dedupe_ttl, 0.0),
+        drain_timeout=max(drain_timeout, 0.0),
+        job_timeout=max(job_timeout, 0.0),
+        stall_timeout=max(stall_timeout, 0.0),
+        memory_limit=max(memory_limit, 0),
+        progress_rate=max(progress_rate, 0.0),
+        log_max_size=max(log_max_size, 0),
+        log_max_age=max(log_max_age, 0.0),
+        log_backups=max(log_backups, 0),
+        log_format=log_format.lower(),
+        job_logs=job_logs.lower() == "true",
+        request_options=split_names(request_options),
+        start_method=start_method.lower(),
     )
 
 
+def split_names(value: str):
+    """Return the lowercase names in a comma-separated list."""
+    return [name.strip().lower() for name in value.split(",") if name.strip()]
+
+
+def get_env_int(key: str, default: int):
+    """Return an environment variable as an integer or the default value."""
+    try:
+        return int(os.environ.get(key, default))
+    except ValueError:
+        return default
+
+
+def get_env_float(key: str, default: float):
+    """Return an environment variable as a float or the default value."""
+    try:
+        return float(os.environ.get(key, default))
+    except ValueError:
+        return default
+
+
 class CustomNamespace(Namespace):
     """Custom namespace for type enforcement."""
 
@@ -142,6 +408,22 @@ class CustomNamespace(Namespace):
         log_level: str,
         server_log_level: str,
         access_log: bool,
+        max_workers: int = 4,
+        host_max_workers: int = 0,
+        host_delay: float = 0.0,
+        dedupe_ttl: float = 0.0,
+        drain_timeout: float = 20.0,
+        job_timeout: float = 0.0,
+        stall_timeout: float = 0.0,
+        memory_limit: int = 0,
+        progress_rate: float = 4.0,
+        log_max_size: int = 10,
+        log_max_age: float = 0.0,
+        log_backups: int = 5,
+        log_format: str = "text",
+        job_logs: bool = False,
+        request_options: list[str] | None = None,
+        start_method: str = "default",
     ):
         super().__init__()
         self.host = host
@@ -150,6 +432,24 @@ class CustomNamespace(Namespace):
         self.log_level = log_level
         self.server_log_level = server_log_level
         self.access_log = access_log
+        self.max_workers = max_workers
+        self.host_max_workers = host_max_workers
+        self.host_delay = host_delay
+        self.dedupe_ttl = dedupe_ttl
+        self.drain_timeout = drain_timeout
+        self.job_timeout = job_timeout
+        self.stall_timeout = stall_timeout
+        self.memory_limit = memory_limit
+        self.progress_rate = progress_rate
+        self.log_max_size = log_max_size
+        self.log_max_age = log_max_age
+        self.log_backups = log_backups
+        self.log_format = log_format
+        self.job_logs = job_logs
+        self.request_options = (
+            split_names(DEFAULT_REQUEST_OPTIONS) if request_options is None else request_options
+        )
+        self.start_method = start_method
 
         self._validate_types()
 
@@ -190,3 +490,115 @@ class CustomNamespace(Namespace):
                     type(self.access_log).__name__
                 )
             )
+
+        if not isinstance(self.max_workers, int):
+            raise TypeError(
+                "Expected 'max_workers' to be of type int, got {}".format(
+                    type(self.max_workers).__name__
+                )
+            )
+
+        if not isinstance(self.host_max_workers, int):
+            raise TypeError(
+                "Expected 'host_max_workers' to be of type int, got {}".format(
+                    type(self.host_max_workers).__name__
+                )
+            )
+
+        if not isinstance(self.host_delay, (int, float)):
+            raise TypeError(
+                "Expected 'host_delay' to be of type float, got {}".format(
+                    type(self.host_delay).__name__
+                )
+            )
+
+        if not isinstance(self.dedupe_ttl, (int, float)):
+            raise TypeError(
+                "Expected 'dedupe_ttl' to be of type float, got {}".format(
+                    type(self.dedupe_ttl).__name__
+                )
+            )
+
+        if not isinstance(self.drain_timeout, (int, float)):
+            raise TypeError(
+                "Expected 'drain_timeout' to be of type float, got {}".format(
+                    type(self.drain_timeout).__name__
+                )
+            )
+
+        if not isinstance(self.job_timeout, (int, float)):
+            raise TypeError(
+                "Expected 'job_timeout' to be of type float, got {}".format(
+                    type(self.job_timeout).__name__
+                )
+            )
+
+        if not isinstance(self.stall_timeout, (int, float)):
+            raise TypeError(
+                "Expected 'stall_timeout' to be of type float, got {}".format(
+                    type(self.stall_timeout).__name__
+                )
+            )
+
+        if not isinstance(self.memory_limit, int):
+            raise TypeError(
+                "Expected 'memory_limit' to be of type int, got {}".format(
+                    type(self.memory_limit).__name__
+                )
+            )
+
+        if not isinstance(self.progress_rate, (int, float)):
+            raise TypeError(
+                "Expected 'progress_rate' to be of type float, got {}".format(
+                    type(self.progress_rate).__name__
+                )
+            )
+
+        if not isinstance(self.log_max_size, int):
+            raise TypeError(
+                "Expected 'log_max_size' to be of type int, got {}".format(
+                    type(self.log_max_size).__name__
+                )
+            )
+
+        if not isinstance(self.log_max_age, (int, float)):
+            raise TypeError(
+                "Expected 'log_max_age' to be of type float, got {}".format(
+                    type(self.log_max_age).__name__
+                )
+            )
+
+        if not isinstance(self.log_backups, int):
+            raise TypeError(
+                "Expected 'log_backups' to be of type int, got {}".format(
+                    type(self.log_backups).__name__
+                )
+            )
+
+        if not isinstance(self.log_format, str):
+            raise TypeError(
+                "Expected 'log_format' to be of type str, got {}".format(
+                    type(self.log_format).__name__
+                )
+            )
+
+        if not isinstance(self.job_logs, bool):
+            raise TypeError(
+                "Expected 'job_logs' to be of type bool, got {}".format(
+                    type(self.job_logs).__name__
+                )
+            )
+
+        if not isinstance(self.request_options, list):
+            raise TypeError(
+                "Expected 'request_options' to be of type list, got {}".format(
+                    type(self.request_options).__name__
+                )
+            )
+
+        if not isinstance(self.start_method, str):
+            raise TypeError(
+                "Expected 'start_method' to be of type str, got {}".format(
+                    type(self.start_method).__name__
+                )
+            )
@@ -3,21 +3,23 @@
 import os
 import sys
 
-import asyncio
+import gzip
 import io
+import json
 import logging
-import pickle
 import queue
 import re
+import shutil
 import threading
+import time
 
-from mmap import mmap, ACCESS_READ, ACCESS_WRITE
-from multiprocessing.queues import Queue
+from multiprocessing.connection import Connection
+from datetime import datetime
 from typing import TextIO, Any
 
 from gallery_dl import output, job
 
-from . import options, utils
+from . import metrics, options, utils
 
 args = options.custom_args
 
@@ -28,6 +30,11 @@ log_dir = args.log_dir
 log_level = args.log_level
 server_log_level = args.server_log_level
 access_log = args.access_log
+progress_rate = args.progress_rate
+log_max_size = args.log_max_size
+log_max_age = args.log_max_age
+log_backups = args.log_backups
+log_format = args.log_format
 
 if server_log_level == "trace":
     server_log_level = "debug"
@@ -40,6 +47,14 @@ LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
 LOG_FORMAT_DEBUG = "%(asctime)s [%(name)s] [%(filename)s:%(lineno)d] [%(levelname)s] %(message)s"
 LOG_FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
 LOG_SEPARATOR = "/sep/"
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+PROGRESS_INTERVAL = 1 / progress_rate if progress_rate else 0.0
+LOG_SEGMENT_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+LOG_MESSAGES = metrics.Counter(
+    "gallery_dl_server_log_messages_written", "Log messages written to log files"
+)
+LOG_ROTATIONS = metrics.Counter("gallery_dl_server_log_rotations", "Log file rotations")
 
 
 def initialise_logging(
@@ -59,14 +74,18 @@ def initialise_logging(
         logger.addHandler(handler_console)
 
         if file:
-            handler_file = setup_file_handler(file, formatter)
+            handler_file = setup_file_handler(file, get_file_formatter(formatter))
             logger.addHandler(handler_file)
 
     return logger
 
 
 class AsyncLogger(logging.Logger):
-    """Custom logger for async logging and logging multi-line messages."""
+    """Custom logger for logging multi-line messages.
+
+    Its handlers only format records and leave writing them to the log writer thread,
+    so it can be used from the event loop without blocking.
+    """
 
     def __init__(self, name: str, level=logging.NOTSET):
         super().__init__(name, level)
@@ -77,17 +96,415 @@ class AsyncLogger(logging.Logger):
             if line.strip():
                 self.log(level, line)
 
-    def handle(self, record):
-        """Override handle method to call the async version."""
+
+class LogWriter:
+    """Write formatted log messages to their streams from a background thread.
+
+    Messages are written in batches of up to `batch_size`, with a single write and
+    flush per stream for each batch. Messages for the same stream keep their order.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.reset()
+
+    def reset(self):
+        """Forget the queue and thread, e.g. those inherited from a forked parent.
+
+        Rotation is disabled again, so only the process that enabled it rotates files.
+        """
+        self.lock = threading.Lock()
+        self.queue: queue.SimpleQueue[tuple[TextIO | Any, str | threading.Event | None]] = (
+            queue.SimpleQueue()
+        )
+        self.thread: threading.Thread | None = None
+        self.max_size = 0
+        self.max_age = 0.0
+        self.compressor: LogCompressor | None = None
+        self.rotation_failed = False
+
+    def configure_rotation(self, max_size: int, max_age: float, backups: int):
+        """Rotate log files once they exceed `max_size` bytes or `max_age` seconds.
+
+        Rotated segments are compressed in the background, keeping at most `backups`
+        of them for each log file (`0` keeps all of them).
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        self.compressor = LogCompressor(backups)
+
+        for log_file in LogFile.instances.values():
+            self.compressor.recover(log_file.name)
+
+    def put(self, stream: TextIO | Any, msg: str):
+        """Queue a message to be written to a stream."""
+        if self.thread is None:
+            self.start()
+
+        self.queue.put((stream, msg))
+
+    def start(self):
+        """Start the writer thread if it is not running yet."""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="LogWriter", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        """Write queued messages until the process exits."""
+        while True:
+            items = [self.queue.get()]
+            try:
+                while len(items) < self.batch_size:
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            batches: dict[int, tuple[TextIO | Any, list[str]]] = {}
+            flushed: list[threading.Event] = []
+            closing: list[TextIO | Any] = []
+
+            for stream, msg in items:
+                if isinstance(msg, threading.Event):
+                    flushed.append(msg)
+                elif msg is None:
+                    closing.append(stream)
+                else:
+                    batches.setdefault(id(stream), (stream, []))[1].append(msg)
+
+            for stream, msgs in batches.values():
+                try:
+                    stream.write("".join(msgs))
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+                else:
+                    if isinstance(stream, LogFile):
+                        LOG_MESSAGES.inc(len(msgs))
+
+                        if stream.rotatable:
+                            self.try_rotate(stream)
+
+            for stream in closing:
+                try:
+                    stream.close()
+                except (OSError, ValueError):
+                    pass
+
+            for event in flushed:
+                event.set()
+
+    def try_rotate(self, log_file: "LogFile"):
+        """Rotate a log file, reporting errors instead of stopping the writer thread.
+
+        If rotation fails, messages keep being written to the current file and
+        rotation is tried again after the next batch. Only the first of consecutive
+        failures is reported.
+        """
+        try:
+            self.rotate(log_file)
+        except Exception as e:
+            if not self.rotation_failed:
+                error = f"{type(e).__name__}: {e}"
+                stderr_write(f"Failed to rotate log file '{log_file.name}': {error}")
+            self.rotation_failed = True
+        else:
+            self.rotation_failed = False
+
+    def rotate(self, log_file: "LogFile"):
+        """Rotate a log file if it has grown too large or old and queue it for compression."""
+        if self.compressor is None or not log_file.should_rotate(self.max_size, self.max_age):
+            return
+
+        segment = log_file.rotate()
+
+        if segment:
+            LOG_ROTATIONS.inc()
+            self.compressor.put(segment)
+
+    def close(self, stream: TextIO | Any):
+        """Close a stream once the messages queued for it so far have been written."""
+        if self.thread is None:
+            self.start()
+
+        self.queue.put((stream, None))
+
+    def flush(self):
+        """Wait until all messages queued so far have been written."""
+        if self.thread is None or not self.thread.is_alive():
+            return
+
+        event = threading.Event()
+        self.queue.put((None, event))
+        event.wait()
+
+
+class LogFile:
+    """Log file shared by all file handlers for the same path.
+
+    Only the log writer thread writes to it, so it can be rotated without the
+    handlers noticing. The file is opened on the first write if it is not open yet.
+    """
+
+    instances: dict[str, "LogFile"] = {}
+
+    def __init__(self, path: str, encoding="utf-8", rotatable=True):
+        self.name = path
+        self.encoding = encoding
+        self.rotatable = rotatable
+        self.stream: TextIO | None = None
+        self.opened = 0.0
+
+    @classmethod
+    def get(cls, path: str):
+        """Return the log file for a path, creating it on first use."""
+        path = os.path.abspath(path)
+
+        if path not in cls.instances:
+            cls.instances[path] = cls(path)
+            cls.instances[path].open()
+
+        return cls.instances[path]
+
+    def open(self):
+        """Open the file for appending."""
+        self.stream = open(self.name, mode="a", encoding=self.encoding)
+        self.opened = time.time()
+
+        return self.stream
+
+    def write(self, s: str):
+        stream = self.stream or self.open()
+        stream.write(s)
+
+    def flush(self):
+        if self.stream:
+            self.stream.flush()
+
+    def close(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+    def should_rotate(self, max_size: int, max_age: float):
+        """Return whether the file has reached the given size in bytes or age in seconds.
+
+        The size is taken from the file itself, as it may have been cleared meanwhile.
+        """
+        if self.stream is None:
+            return False
+
+        size = os.fstat(self.stream.fileno()).st_size
+
+        if max_size and size >= max_size:
+            return True
+
+        return bool(max_age and size and time.time() - self.opened >= max_age)
+
+    def rotate(self):
+        """Rename the file to a timestamped segment and start a new one.
+
+        Return the path of the segment, or None if the file could not be renamed,
+        e.g. because another process has it open on Windows.
+        """
+        self.close()
+
+        root, ext = os.path.splitext(self.name)
+        stamp = time.strftime(LOG_SEGMENT_FORMAT)
+        segment = f"{root}.{stamp}{ext}"
+
+        count = 1
+        while os.path.exists(segment) or os.path.exists(segment + ".gz"):
+            segment = f"{root}.{stamp}-{count}{ext}"
+            count += 1
+
+        try:
+            os.replace(self.name, segment)
+        except OSError:
+            segment = None
+
+        self.open()
+        return segment
+
+
+class LogCompressor:
+    """Compress rotated log segments in a background thread and remove old ones."""
+
+    def __init__(self, backups: int):
+        self.backups = backups
+        self.queue: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self.thread: threading.Thread | None = None
+
+    def put(self, segment: str):
+        """Queue a segment to be compressed."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="LogCompressor", daemon=True)
+            self.thread.start()
+
+        self.queue.put(segment)
+
+    def run(self):
+        """Compress queued segments until the process exits."""
+        while True:
+            segment = self.queue.get()
+            try:
+                self.compress(segment)
+                self.prune(segment)
+            except OSError:
+                pass
+
+    def compress(self, segment: str):
+        """Compress a segment to a `.gz` file and remove the original."""
+        tmp = segment + ".gz.tmp"
+
+        with open(segment, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+        os.replace(tmp, segment + ".gz")
+        os.remove(segment)
+
+    def prune(self, segment: str):
+        """Remove the oldest compressed segments beyond the number of backups to keep."""
+        if not self.backups:
+            return
+
+        directory, pattern = segment_pattern(segment)
+        segments: list[tuple[str, int, str]] = []
+
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                segments.append((match.group(1), int(match.group(2) or 0), name))
+
+        for *_, name in sorted(segments)[: -self.backups]:
+            os.remove(os.path.join(directory, name))
+
+    def recover(self, path: str):
+        """Queue segments of a log file left uncompressed by a previous run."""
+        directory, pattern = segment_pattern(path)
+
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return
+
+        for name in names:
+            if name.endswith(".gz.tmp") and pattern.match(name[: -len(".tmp")]):
+                os.remove(os.path.join(directory, name))
+
+        for name in names:
+            if pattern.match(name) and not name.endswith(".gz"):
+                self.put(os.path.join(directory, name))
+
+
+def segment_pattern(path: str):
+    """Return the directory of a log file or segment and a pattern matching its segments."""
+    directory, name = os.path.split(path)
+    root, ext = os.path.splitext(name)
+
+    match = re.match(r"(.+)\.\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(?:-\d+)?$", root)
+    if match:
+        root = match.group(1)
+
+    pattern = re.compile(
+        rf"{re.escape(root)}\.(\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}})(?:-(\d+))?"
+        rf"{re.escape(ext)}(?:\.gz)?$"
+    )
+    return directory, pattern
+
+
+log_writer = LogWriter()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=log_writer.reset)
+
+
+class QueuedStreamHandler(logging.StreamHandler):
+    """Stream handler that formats records and leaves writing them to the log writer."""
+
+    def emit(self, record):
+        try:
+            log_writer.put(self.stream, self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        log_writer.flush()
+
+
+class QueuedFileHandler(QueuedStreamHandler):
+    """File handler that formats records and leaves writing them to the log writer.
+
+    Handlers for the same path share a single `LogFile`, which stays open when a
+    handler is closed so the others can keep using it.
+    """
+
+    def __init__(self, filename: str):
+        super().__init__(LogFile.get(filename))
+
+
+class JobFileHandler(logging.Handler):
+    """Write records that belong to a job to a separate log file for each job.
+
+    Records without a `job_id` attribute are ignored. Job log files are only appended to
+    and are not rotated.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.files: dict[int, LogFile] = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+    def emit(self, record):
+        job_id = getattr(record, "job_id", None)
+        if job_id is None:
+            return
+
         try:
-            event_loop = asyncio.get_running_loop()
-            event_loop.create_task(self.handle_async(record))
-        except RuntimeError:
-            asyncio.run(self.handle_async(record))
+            log_file = self.files.get(job_id)
+
+            if log_file is None:
+                path = utils.get_job_log_path(self.directory, job_id)
+                log_file = self.files[job_id] = LogFile(path, rotatable=False)
+
+            log_writer.put(log_file, self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def close_job(self, job_id: int):
+        """Close the log file of a job after its remaining records have been written."""
+        log_file = self.files.pop(job_id, None)
+
+        if log_file is not None:
+            log_writer.close(log_file)
+
+    def close(self):
+        for job_id in list(self.files):
+            self.close_job(job_id)
+
+        super().close()
+
 
-    async def handle_async(self, record: logging.LogRecord):
-        """Perform asynchronous handling of log records."""
-        super().handle(record)
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON objects with the time, level, logger, job ID and message."""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created)
+            .astimezone()
+            .isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "job_id": getattr(record, "job_id", None),
+            "message": remove_ansi_escape_sequences(record.getMessage()).rstrip(),
+        }
+
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(data, ensure_ascii=False)
 
 
 class CustomFormatter(logging.Formatter):
@@ -102,24 +519,42 @@ class CustomFormatter(logging.Formatter):
 
 def remove_ansi_escape_sequences(text: str, /):
     """Remove ANSI escape sequences from the given text."""
-    ansi_escape_pattern = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
-    return ansi_escape_pattern.sub("", text)
+    return ANSI_ESCAPE_PATTERN.sub("", text)
 
 
 def setup_stream_handler(stream: TextIO | Any, formatter: logging.Formatter):
     """Set up a console handler for logging."""
-    stream_handler = logging.StreamHandler(stream)
+    stream_handler = QueuedStreamHandler(stream)
     stream_handler.setFormatter(formatter)
     register_handler(stream_handler)
 
     return stream_handler
 
 
+def get_file_formatter(formatter: logging.Formatter):
+    """Return the formatter for log files, which is the given one unless JSON is selected."""
+    return JsonFormatter() if log_format == "json" else formatter
+
+
+def setup_job_file_handler(directory: str, *loggers: logging.Logger):
+    """Set up a handler writing job records to separate files and add it to the loggers."""
+    formatter = CustomFormatter(LOG_FORMAT, LOG_FORMAT_DATE)
+
+    job_handler = JobFileHandler(directory)
+    job_handler.setFormatter(get_file_formatter(formatter))
+    register_handler(job_handler)
+
+    for logger in loggers:
+        logger.addHandler(job_handler)
+
+    return job_handler
+
+
 def setup_file_handler(file: str, formatter: logging.Formatter):
     """Set up a file handler for logging."""
     os.makedirs(os.path.dirname(file), exist_ok=True)
 
-    file_handler = logging.FileHandler(file, mode="a", encoding="utf-8", delay=False)
+    file_handler = QueuedFileHandler(file)
     file_handler.setFormatter(formatter)
     register_handler(file_handler)
 
@@ -164,73 +599,85 @@ def setup_logging(level=LOG_LEVEL_DL):
     return logger
 
 
-def capture_logs(log_queue: Queue[dict[str, Any]]):
-    """Send logs that reach the root logger to a queue."""
+def capture_logs(connection: Connection, job_id: int | None = None):
+    """Send logs that reach the root logger to the parent process and return the handler."""
     root = logging.getLogger()
-    queue_handler = QueueHandler(log_queue)
+    pipe_handler = PipeHandler(connection, job_id)
 
     if root.handlers:
         existing_handler = root.handlers[0]
-        queue_handler.setFormatter(existing_handler.formatter)
+        pipe_handler.setFormatter(existing_handler.formatter)
 
         for handler in root.handlers[:]:
             if isinstance(handler, logging.StreamHandler):
                 handler.close()
                 root.removeHandler(handler)
 
-    root.addHandler(queue_handler)
-    register_handler(handler)
+    root.addHandler(pipe_handler)
+    register_handler(pipe_handler)
 
+    return pipe_handler
 
-class QueueHandler(logging.Handler):
-    """Custom logging handler that sends log messages to a queue."""
 
-    def __init__(self, queue: Queue[dict[str, Any]]):
-        super().__init__()
-        self.queue = queue
+class PipeHandler(logging.Handler):
+    """Custom logging handler that sends log messages through a pipe."""
+
+    send_lock = threading.Lock()
+
+    def __init__(self, connection: Connection, job_id: int | None = None):
+        super().__init__(LOG_LEVEL_MIN)
+        self.connection = connection
+        self.job_id = job_id
 
     def emit(self, record: logging.LogRecord):
         record.msg = self.format(record).strip()
         record.args = ()
-        record_dict = record_to_dict(record)
 
-        self.queue.put(record_dict)
+        self.send(record_to_tuple(record, self.job_id))
 
+    def send(self, obj: Any):
+        """Send an object through the pipe, one message at a time."""
+        with self.send_lock:
+            try:
+                self.connection.send(obj)
+            except OSError:
+                pass
 
-def record_to_dict(record: logging.LogRecord):
-    """Convert a log record into a dictionary."""
-    record_dict = record.__dict__.copy()
-    record_dict["level"] = record.levelno
 
-    sanitise_dict(record_dict)
+def forward_logs(handler: PipeHandler, *loggers: logging.Logger):
+    """Send the records of loggers to the parent process instead of writing them.
 
-    return record_dict
+    This makes the server the only process that writes to the log file.
+    """
+    for logger in loggers:
+        for existing_handler in logger.handlers[:]:
+            existing_handler.close()
+            logger.removeHandler(existing_handler)
 
+        logger.addHandler(handler)
 
-def sanitise_dict(record_dict: dict[str, Any]):
-    """Remove non-serialisable values from a dictionary."""
-    keys_to_remove = []
+    register_handler(handler)
 
-    for key, value in record_dict.items():
-        if not is_serialisable(value):
-            keys_to_remove.append(key)
 
-    for key in keys_to_remove:
-        record_dict.pop(key)
+def record_to_tuple(record: logging.LogRecord, job_id: int | None = None):
+    """Convert a log record into a tuple that is small and quick to serialise.
 
+    Only the fields needed by the parent process are kept:
+    `(level, name, msg, created, job_id)`.
+    """
+    return (record.levelno, record.name, record.msg, record.created, job_id)
 
-def is_serialisable(value: Any):
-    """Check if a value can be serialised."""
-    try:
-        pickle.dumps(value)
-        return True
-    except Exception:
-        return False
 
+def tuple_to_record(data: tuple[int, str, str, float, int | None]):
+    """Convert a tuple created by `record_to_tuple` back into a log record."""
+    level, name, msg, created, job_id = data
 
-def dict_to_record(record_dict: dict[str, Any]):
-    """Convert a dictionary back into a log record."""
-    return logging.LogRecord(**record_dict)
+    record = logging.LogRecord(name, level, "", 0, msg, None, None)
+    record.created = created
+    record.msecs = (created - int(created)) * 1000
+    record.job_id = job_id
+
+    return record
 
 
 def stdout_write(s: str, /):
@@ -252,27 +699,22 @@ def redirect_standard_streams(level=logging.INFO):
     setattr(sys, "stdout", logger_writer)
     setattr(sys, "stderr", logger_writer)
 
+    return logger_writer
+
 
 class LoggerWriter:
-    """Log writes to stdout and stderr."""
+    """Log writes to stdout and stderr.
+
+    Progress lines are not logged as they arrive, since download progress is reported
+    to the server separately. Only the last progress line of a download is logged
+    before the next message.
+    """
 
     def __init__(self, level=logging.INFO):
         self.level = level
-        self.stream = sys.__stdout__
+        self.pending_progress = ""
         self.logger = initialise_logging(type(self).__name__)
 
-        for handler in self.logger.handlers[:]:
-            handler.close()
-            self.logger.removeHandler(handler)
-
-        self.stream_handler = ConsoleProgress(self.stream)
-        self.file_handler = FileProgress()
-
-        self.logger.addHandler(self.stream_handler)
-        self.logger.addHandler(self.file_handler)
-
-        register_handler(self.stream_handler, self.file_handler)
-
     def write(self, msg: str, /):
         """Prepare and log messages."""
         msg = msg.strip()
@@ -280,6 +722,12 @@ class LoggerWriter:
         if not msg:
             return
 
+        if "B/s" in msg:
+            self.pending_progress = msg
+            return
+
+        self.flush_progress()
+
         if msg.startswith("* "):
             msg = f"Download successful: {msg[2:]}"
 
@@ -292,133 +740,11 @@ class LoggerWriter:
     def flush(self):
         pass
 
-
-class NullStream(io.TextIOBase):
-    """Suppress writes to stdout or stderr."""
-
-    def write(self, _: str, /):
-        pass
-
-    def flush(self):
-        pass
-
-
-class ConsoleProgress(logging.StreamHandler):
-    """Custom stream handler that can handle progress updates."""
-
-    def __init__(self, stream: TextIO | Any = NullStream()):
-        super().__init__(stream)
-        self.stream: TextIO | Any
-        self.formatter = CustomFormatter(LOG_FORMAT, LOG_FORMAT_DATE)
-        self.last_msg = ""
-
-    def emit(self, record):
-        """Override emit method to write final progress update."""
-        msg = self.format(record)
-
-        if "B/s" not in msg and "B/s" in self.last_msg:
-            self.stream.write(self.last_msg + "\n")
-            self.stream.flush()
-
-        if "B/s" not in msg:
-            super().emit(record)
-
-        self.last_msg = msg
-
-
-class FileProgress(logging.FileHandler):
-    """Custom file handler that can handle progress updates asynchronously."""
-
-    def __init__(self, filename=LOG_FILE, mode="a", encoding="utf-8", delay=False):
-        super().__init__(filename, mode, encoding, delay)
-        self.formatter = CustomFormatter(LOG_FORMAT, LOG_FORMAT_DATE)
-        self.last_pos = 0
-        self.queue = queue.Queue()
-        self.thread = threading.Thread(target=self.process_queue, daemon=True)
-        self.thread_lock = threading.Lock()
-        self.thread.start()
-
-    def emit(self, record):
-        """Override emit method to queue progress messages."""
-        msg = self.format(record)
-
-        if "B/s" in msg:
-            self.queue.put(msg)
-        else:
-            with self.thread_lock:
-                super().emit(record)
-
-    def process_queue(self):
-        """Process logging queue in a separate thread."""
-        while True:
-            msg = self.queue.get()
-            if msg is None:
-                break
-            with self.thread_lock:
-                self.write_to_file(msg)
-
-    def write_to_file(self, msg: str):
-        """Write download progress to the memory-mapped log file."""
-        with open(self.baseFilename, "r+b") as file:
-            with mmap(file.fileno(), 0, access=ACCESS_WRITE) as mm:
-                self.write_progress(mm, msg)
-
-    def write_progress(self, mmap: mmap, msg: str):
-        """Write download progress updates to the same line."""
-        if self.last_pos == 0:
-            self.last_pos = mmap.rfind(b"\n") + 1
-
-        mmap.seek(self.last_pos)
-
-        new_msg = msg.encode("utf-8")
-        new_msg_length = len(new_msg)
-        target_msg_length = 54
-
-        padding = b""
-        if new_msg_length < target_msg_length:
-            padding = b" " * (target_msg_length - new_msg_length)
-
-        terminator = b"\n"
-        new_size = self.last_pos + max(new_msg_length, target_msg_length) + 1
-
-        if utils.WINDOWS:
-            terminator = b"\r\n"
-            new_size += 1
-
-        if new_size > mmap.size():
-            mmap.resize(new_size)
-
-        mmap.write(new_msg + padding + terminator)
-        mmap.flush()
-
-    def close(self):
-        """Stop logging thread and close handler."""
-        self.queue.put(None)
-        self.thread.join()
-        super().close()
-
-
-def read_previous_line(file_path: str, last_position: int):
-    """Return the previous line of a file or from a given position."""
-    previous_line = ""
-    position = 0
-
-    if os.path.getsize(file_path) == 0:
-        return previous_line, position
-
-    with open(file_path, "rb") as file:
-        with mmap(file.fileno(), 0, access=ACCESS_READ) as mm:
-            if last_position == 0:
-                position = mm.rfind(b"\n", 0, mm.size() - 2) + 1
-                if position == 0:
-                    return previous_line, position
-            else:
-                position = last_position
-
-            next_line = mm.find(b"\n", position) + 1
-            previous_line = mm[position:next_line].decode("utf-8")
-
-    return previous_line, position
+    def flush_progress(self):
+        """Log the last progress line if it has not been logged yet."""
+        if self.pending_progress:
+            self.logger.log(self.level, self.pending_progress)
+            self.pending_progress = ""
 
 
 class StringLogger:
@@ -505,7 +831,12 @@ class WebSocketFilter(logging.Filter):
 
     def filter(self, record):
         msg = record.getMessage()
-        strings = ["WebSocket /ws/logs", "connection open", "connection closed"]
+        strings = [
+            "WebSocket /ws/logs",
+            "WebSocket /ws/progress",
+            "connection open",
+            "connection closed",
+        ]
         return not any(string in msg for string in strings)
 
 
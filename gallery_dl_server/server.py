@@ -1,53 +1,65 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
-import multiprocessing
+import functools
+import importlib
+import json
 import os
-import queue
 import shutil
 import signal
 import time
 
 from contextlib import asynccontextmanager
-from multiprocessing.queues import Queue
 from types import FrameType
-from typing import Any
+from typing import Any, AsyncIterator, Callable
 
 import aiofiles
-import watchfiles
 
 from starlette.applications import Starlette
-from starlette.background import BackgroundTask
 from starlette.datastructures import UploadFile
 from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import RedirectResponse, JSONResponse, StreamingResponse
+from starlette.responses import (
+    FileResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from starlette.requests import Request
 from starlette.routing import Route, WebSocketRoute, Mount
 from starlette.staticfiles import StaticFiles
 from starlette.status import (
     HTTP_200_OK,
+    HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
     HTTP_500_INTERNAL_SERVER_ERROR,
 )
-from starlette.templating import Jinja2Templates
 from starlette.types import ASGIApp
 from starlette.websockets import WebSocket, WebSocketDisconnect, WebSocketState
 
-import gallery_dl.version
-import yt_dlp.version
-
-from . import download, output, utils, version
+from . import config, download, jobs, logindex, logtail, metrics, output, store, utils, version
 
 custom_args = output.args
 
 log_file = output.LOG_FILE
-last_line = ""
-last_position = 0
 
 log = output.initialise_logging(__name__)
 
+LOG_PAGE_SIZE = 1000
+LOG_PAGE_SIZE_MAX = 10000
+SSE_HEARTBEAT_INTERVAL = 15.0
+
+
+@functools.cache
+def get_templates():
+    """Return the page templates, importing Jinja2 on first use."""
+    from starlette.templating import Jinja2Templates
+
+    return Jinja2Templates(directory=utils.resource_path("templates"))
+
 
 async def redirect(request: Request):
     """Redirect to homepage on request."""
@@ -56,25 +68,27 @@ async def redirect(request: Request):
 
 async def homepage(request: Request):
     """Return homepage template response."""
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request,
         "index.html",
         {
             "app_version": version.__version__,
-            "gallery_dl_version": gallery_dl.version.__version__,
-            "yt_dlp_version": yt_dlp.version.__version__,
+            "gallery_dl_version": utils.get_version("gallery-dl", "gallery_dl.version"),
+            "yt_dlp_version": utils.get_version("yt-dlp", "yt_dlp.version"),
         },
     )
 
 
 async def submit_form(request: Request):
-    """Process form submission data and start download in the background."""
+    """Process form submission data and add the download to the job queue."""
     form_data = await request.form()
 
-    keys = ("url", "video-opts")
+    keys = ("url", "video-opts", "options")
     values = tuple(form_data.get(key) for key in keys)
 
-    url, video_opts = (None if isinstance(value, UploadFile) else value for value in values)
+    url, video_opts, overrides = (
+        None if isinstance(value, UploadFile) else value for value in values
+    )
 
     if not url:
         log.error("No URL provided.")
@@ -86,93 +100,510 @@ async def submit_form(request: Request):
             },
         )
 
-    if not video_opts:
-        video_opts = "none-selected"
-
-    request_options = {"video-options": video_opts}
+    try:
+        request_options = get_request_options(video_opts, overrides)
+    except ValueError as e:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": str(e),
+            },
+            status_code=HTTP_400_BAD_REQUEST,
+        )
 
-    task = BackgroundTask(download_task, url.strip(), request_options)
+    job_id, duplicate = await scheduler.submit(url.strip(), request_options)
 
-    log.info("Added URL to the download queue: %s", url)
+    if duplicate:
+        log.info("URL is already in the download queue: %s", url)
+    else:
+        log.info("Added URL to the download queue: %s", url)
 
     return JSONResponse(
         {
             "success": True,
+            "id": job_id,
+            "duplicate": duplicate,
             "url": url,
             "options": request_options,
         },
-        background=task,
     )
 
 
-def download_task(url: str, request_options: dict[str, str]):
-    """Initiate download as a subprocess and log the output."""
-    log_queue: Queue[dict[str, Any]] = multiprocessing.Queue()
-    return_status: Queue[int] = multiprocessing.Queue()
+async def submit_batch(request: Request):
+    """Add many URLs to the job queue from a JSON array, text body or uploaded file.
 
-    args = (url, request_options, log_queue, return_status, custom_args)
+    URLs are read from the request as it is received and collected in a temporary table,
+    which removes duplicates, before they are all added to the queue in one transaction.
+    """
+    content_type = request.headers.get("content-type", "")
+    video_opts = request.query_params.get("video-opts")
+    overrides = request.query_params.get("options")
 
-    process = multiprocessing.Process(target=download.run, args=args)
-    process.start()
+    spool = job_store.spool()
+    try:
+        if content_type.startswith("application/json"):
+            urls = utils.iter_json_array(request.stream())
+        elif content_type.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+            form_data = await request.form()
+
+            upload = form_data.get("file")
+            text = form_data.get("urls")
+            video_opts = form_data.get("video-opts") or video_opts
+            overrides = form_data.get("options") or overrides
+
+            if isinstance(upload, UploadFile):
+                urls = utils.iter_lines(iter_upload(upload))
+            elif isinstance(text, str):
+                urls = utils.iter_lines(iter_bytes(text.encode("utf-8")))
+            else:
+                urls = utils.iter_lines(iter_bytes(b""))
+        else:
+            urls = utils.iter_lines(request.stream())
+
+        # options are checked before URLs are read from the request
+        request_options = get_request_options(video_opts, overrides)
+
+        await spool_urls(urls, spool)
+
+        if not spool.count:
+            log.error("No URLs provided.")
+
+            return JSONResponse(
+                {
+                    "success": False,
+                    "error": "/q/batch called without any URLs",
+                },
+                status_code=HTTP_400_BAD_REQUEST,
+            )
+
+        ids, duplicates = await scheduler.submit_many(spool, request_options)
+    except ValueError as e:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": str(e),
+            },
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+    finally:
+        spool.close()
+
+    log.info(f"Added {len(ids) - duplicates} URLs to the download queue")
+
+    if duplicates:
+        log.info(f"Skipped {duplicates} URLs already in the download queue")
+
+    return JSONResponse(
+        {
+            "success": True,
+            "count": len(ids),
+            "duplicates": duplicates,
+            "ids": ids,
+            "options": request_options,
+        },
+    )
+
+
+def get_request_options(video_opts: Any, overrides: Any):
+    """Return the options of a download request.
+
+    Gallery-dl options are given as a JSON object and validated against the options
+    that requests are allowed to override; a `ValueError` is raised if they are invalid.
+    """
+    if not isinstance(video_opts, str) or not video_opts:
+        video_opts = "none-selected"
 
-    while True:
-        if log_queue.empty() and not process.is_alive():
-            break
+    request_options: dict[str, Any] = {"video-options": video_opts}
+
+    if isinstance(overrides, str) and overrides:
         try:
-            record_dict = log_queue.get(timeout=1)
-            record = output.dict_to_record(record_dict)
+            overrides = json.loads(overrides)
+        except json.JSONDecodeError:
+            raise ValueError("Expected 'options' to be a JSON object")
+
+        overrides = config.validate_overrides(overrides, custom_args.request_options)
+
+        if overrides:
+            request_options["overrides"] = overrides
+
+    return request_options
 
-            if record.levelno >= output.LOG_LEVEL_MIN:
-                log.handle(record)
 
-            if "Video should already be available" in record.getMessage():
-                log.warning("Terminating process as video is not available")
-                process.kill()
-        except queue.Empty:
+async def spool_urls(urls: AsyncIterator[Any], spool: store.UrlSpool, batch_size=500):
+    """Add URLs to the spool in batches, skipping blank lines, comments and duplicates.
+
+    URLs are compared by their normalised form, but added as they were given.
+
+    Raises:
+        ValueError: If an entry is not an http(s) URL with a host.
+    """
+    batch: list[tuple[str, str]] = []
+
+    async for url in urls:
+        if not isinstance(url, str):
+            raise ValueError("Expected every URL to be a string")
+
+        url = url.strip()
+        if not url or url.startswith("#"):
             continue
 
-    process.join()
+        if not utils.is_url(url):
+            raise ValueError(f"Not a valid URL: {url[:200]!r}")
+
+        batch.append((utils.normalise_url(url), url))
+        if len(batch) >= batch_size:
+            spool.add(batch)
+            batch.clear()
+
+    if batch:
+        spool.add(batch)
+
+
+async def iter_upload(upload: UploadFile, chunk_size=64 * 1024):
+    """Read an uploaded file in chunks."""
+    while chunk := await upload.read(chunk_size):
+        yield chunk
 
+
+async def iter_bytes(data: bytes):
+    """Yield bytes as a single chunk."""
+    yield data
+
+
+async def download_task(job: jobs.Job):
+    """Run a download job and close its log file, however the download ends."""
     try:
-        exit_code = return_status.get(block=False)
-    except queue.Empty:
-        exit_code = process.exitcode
+        return await run_download(job)
+    finally:
+        if job_log_handler is not None:
+            job_log_handler.close_job(job.id)
+
+
+async def run_download(job: jobs.Job):
+    """Initiate download as a subprocess and log the output."""
+    url, request_options = job.url, job.options
+
+    extra = {"job_id": job.id}
+
+    log.info(f"Requested download with the following options: {request_options}", extra=extra)
+
+    # also picks up changes the watcher missed, e.g. on file systems without notifications
+    conf, entries_added, entries_removed = await asyncio.to_thread(
+        config_cache.resolve,
+        request_options.get("video-options", "none-selected"),
+        request_options.get("overrides"),
+    )
+
+    if any(entries_added):
+        log.info(f"Added entries to the config dict: {entries_added}", extra=extra)
+
+    if any(entries_removed):
+        log.info(f"Removed entries from the config dict: {entries_removed}", extra=extra)
+
+    if prestart_task is not None:
+        # do not fork while modules are still being imported in another thread
+        await asyncio.shield(prestart_task)
+
+    if job.status != jobs.RUNNING:
+        # cancelled or interrupted while the config was resolved or modules were imported
+        return None
+
+    receiver, sender = mp_context.Pipe(duplex=False)
+    result: dict[str, int] = {}
+
+    args = (url, conf, sender, custom_args, time.time(), job.id)
 
-    if exit_code == 0:
-        log.info("Download process exited successfully")
+    process = mp_context.Process(target=download.run, args=args)
+    process.start()
+    sender.close()
+
+    job.process = process
+
+    def handle(message: tuple[Any, ...] | dict[str, Any]):
+        job.last_activity = time.monotonic()
+
+        if isinstance(message, dict):
+            if "progress" in message:
+                scheduler.update_progress(job, *message["progress"])
+            else:
+                result.update(message["result"])
+            return
+
+        # records below the minimum log level are already dropped by the download process
+        record = output.tuple_to_record(message)
+        log.handle(record)
+
+        if "Video should already be available" in record.getMessage():
+            log.warning("Terminating process as video is not available", extra=extra)
+            process.kill()
+
+    try:
+        await jobs.watch_process(process, receiver, handle)
+    finally:
+        receiver.close()
+
+    process.join()
+
+    exit_code = result.get("status", process.exitcode)
+    job.files = result.get("files", 0)
+    job.bytes = result.get("bytes", 0)
+
+    if job.status == jobs.FAILED:
+        log.error(f"Download process was stopped: {job.error}", extra=extra)
+    elif job.status in (jobs.CANCELLED, jobs.INTERRUPTED):
+        log.warning(f"Download process was {job.status}", extra=extra)
+    elif exit_code == 0:
+        log.info("Download process exited successfully", extra=extra)
     else:
-        log.error("Download failed with exit code: %s", exit_code)
+        log.error("Download failed with exit code: %s", exit_code, extra=extra)
 
+    return exit_code
 
-async def log_route(request: Request):
-    """Return logs page template response."""
 
-    async def read_log_file(file_path: str):
-        log_contents = ""
+async def list_jobs(request: Request):
+    """Return the most recent jobs, optionally filtered by status."""
+    params = request.query_params
+
+    status = params.get("status")
+    try:
+        before = int(params["before"]) if "before" in params else None
+        limit = min(max(int(params.get("limit", 100)), 1), 1000)
+    except ValueError:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": "'before' and 'limit' must be integers",
+            },
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+    return JSONResponse(
+        {
+            "success": True,
+            "jobs": job_store.query(status, before, limit),
+        },
+    )
+
+
+async def get_job(request: Request):
+    """Return a single job by its ID."""
+    job = job_store.get(request.path_params["job_id"])
+
+    if job is None:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": "Job not found.",
+            },
+            status_code=HTTP_404_NOT_FOUND,
+        )
+
+    live_job = scheduler.jobs.get(job["id"])
+    job["progress"] = live_job.progress if live_job else None
+
+    return JSONResponse(
+        {
+            "success": True,
+            "job": job,
+        },
+    )
+
+
+async def get_progress(request: Request):
+    """Return the live state and download progress of all running and paused jobs."""
+    return JSONResponse(
+        {
+            "success": True,
+            "jobs": scheduler.snapshot(),
+        },
+    )
+
+
+async def cancel_job(request: Request):
+    """Cancel a queued, running or paused job."""
+    return control_job(request, scheduler.cancel, "cancelled")
+
+
+async def pause_job(request: Request):
+    """Suspend a running job and release its worker slot."""
+    return control_job(request, scheduler.pause, "paused")
+
+
+async def resume_job(request: Request):
+    """Resume a paused job once a worker slot is free."""
+    return control_job(request, scheduler.resume, "resumed")
+
+
+def control_job(request: Request, action: Callable[[int], bool], verb: str):
+    """Apply a scheduler action to a job and return the updated job."""
+    job_id: int = request.path_params["job_id"]
+
+    if job_store.get(job_id) is None:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": "Job not found.",
+            },
+            status_code=HTTP_404_NOT_FOUND,
+        )
+
+    if not action(job_id):
+        return JSONResponse(
+            {
+                "success": False,
+                "error": f"Job cannot be {verb} in its current state.",
+            },
+            status_code=HTTP_409_CONFLICT,
+        )
+
+    return JSONResponse(
+        {
+            "success": True,
+            "job": job_store.get(job_id),
+        },
+    )
+
+
+async def get_job_log(request: Request):
+    """Return the log file of a single job, if job logs are enabled."""
+    job_id = request.path_params["job_id"]
+    path = utils.get_job_log_path(job_log_dir, job_id)
+
+    if not os.path.isfile(path):
+        return JSONResponse(
+            {
+                "success": False,
+                "error": "Job log not found.",
+            },
+            status_code=HTTP_404_NOT_FOUND,
+        )
+
+    return FileResponse(path, media_type="text/plain")
+
+
+async def get_metrics(request: Request):
+    """Return server metrics in the Prometheus text format."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def register_metrics():
+    """Expose the state of the job queue, client connections and log file as gauges."""
+    started = time.time() - (time.monotonic() - utils.START_TIME)
+
+    def log_file_size():
         try:
-            async with aiofiles.open(file_path, mode="r", encoding="utf-8") as file:
-                async for line in file:
-                    log_contents += line
-        except FileNotFoundError:
-            return "Log file not found."
-        except Exception as e:
-            log.debug(f"Exception: {type(e).__name__}: {e}")
-            return f"An error occurred: {e}"
+            return os.path.getsize(log_file)
+        except OSError:
+            return 0
+
+    metrics.Gauge(
+        "gallery_dl_server_start_time_seconds",
+        "Time the server was started in seconds since the epoch",
+        lambda: started,
+    )
+    metrics.Gauge(
+        "gallery_dl_server_jobs_queued", "Download jobs waiting", lambda: scheduler.queued
+    )
+    metrics.Gauge(
+        "gallery_dl_server_jobs_running", "Download jobs running", lambda: len(scheduler.running)
+    )
+    metrics.Gauge(
+        "gallery_dl_server_jobs_paused", "Download jobs paused", lambda: len(scheduler.paused)
+    )
+    metrics.Gauge(
+        "gallery_dl_server_workers", "Maximum concurrent downloads", lambda: scheduler.max_workers
+    )
+    metrics.Gauge(
+        "gallery_dl_server_queue_oldest_seconds",
+        "Seconds the oldest waiting download job has been queued",
+        scheduler.queue_age,
+    )
+    metrics.Gauge(
+        "gallery_dl_server_websocket_connections",
+        "Open WebSocket connections",
+        lambda: len(active_connections),
+    )
+    metrics.Gauge(
+        "gallery_dl_server_job_subscribers",
+        "WebSocket and event stream clients receiving job updates",
+        lambda: len(scheduler.subscribers),
+    )
+    metrics.Gauge(
+        "gallery_dl_server_log_subscribers",
+        "WebSocket and event stream clients following the log file",
+        lambda: len(log_tailer.subscribers),
+    )
+    metrics.Gauge("gallery_dl_server_log_file_bytes", "Size of the log file", log_file_size)
 
-        return log_contents if log_contents else "No logs to display."
 
-    logs = await read_log_file(log_file)
+async def log_route(request: Request):
+    """Return logs page template response with the most recent lines of the log file."""
+    start = 0
+    try:
+        page = await asyncio.to_thread(log_index.tail, LOG_PAGE_SIZE)
+        logs, start = page["lines"] or "No logs to display.", page["start"]
+    except FileNotFoundError:
+        logs = "Log file not found."
+    except Exception as e:
+        log.debug(f"Exception: {type(e).__name__}: {e}")
+        logs = f"An error occurred: {e}"
 
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request,
         "logs.html",
         {
             "app_version": version.__version__,
             "logs": logs,
+            "start": start,
         },
     )
 
 
+async def log_lines(request: Request):
+    """Return a page of lines from the log file.
+
+    `tail` returns that many lines from the end of the file. `before` and `after` return
+    up to `limit` lines before or from a byte offset, e.g. the `start` or `end` of a
+    previous page.
+    """
+    params = request.query_params
+    try:
+        if "before" in params:
+            offset = int(params["before"])
+            method = log_index.before
+        elif "after" in params:
+            offset = int(params["after"])
+            method = log_index.after
+        else:
+            offset = None
+            method = log_index.tail
+
+        count = int(params.get("tail" if offset is None else "limit", LOG_PAGE_SIZE))
+        count = min(max(count, 0), LOG_PAGE_SIZE_MAX)
+    except ValueError:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": "'tail', 'before', 'after' and 'limit' must be integers",
+            },
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+    args = (count,) if offset is None else (max(offset, 0), count)
+    try:
+        page = await asyncio.to_thread(method, *args)
+    except FileNotFoundError:
+        return JSONResponse(
+            {
+                "success": False,
+                "error": "Log file not found.",
+            },
+            status_code=HTTP_404_NOT_FOUND,
+        )
+
+    return JSONResponse({"success": True, **page})
+
+
 async def clear_logs(request: Request):
     """Clear the log file on request."""
     try:
@@ -238,61 +669,215 @@ async def log_stream(request: Request):
 
 
 async def log_update(websocket: WebSocket):
-    """Stream log file updates over WebSocket connection."""
-    global last_line, last_position
+    """Send new lines written to the log file over WebSocket connection.
+
+    Each message contains the `lines` with their `start` and `end` byte offsets in the
+    log file. A client that connects with `?since=<offset>`, e.g. the `end` of the last
+    message or of a page of lines, first receives the lines it has missed.
 
+    All connections share a single task following the log file. A connection that
+    cannot keep up is closed, and the client is expected to reconnect.
+    """
     await websocket.accept()
     log.debug(f"Accepted WebSocket connection: {websocket}")
 
     async with connections_lock:
         active_connections.add(websocket)
         log.debug("WebSocket added to active connections")
+
     try:
-        async with aiofiles.open(log_file, mode="r", encoding="utf-8") as file:
-            await file.seek(0, os.SEEK_END)
-
-            async for changes in watchfiles.awatch(
-                log_file,
-                stop_event=shutdown_event,
-                rust_timeout=100,
-                yield_on_timeout=True,
-            ):
-                new_content = ""
-                do_update_state = False
-
-                previous_line, position = await asyncio.to_thread(
-                    output.read_previous_line, log_file, last_position
-                )
-                if "B/s" in previous_line and previous_line != last_line:
-                    new_content = previous_line
-                    do_update_state = True
+        since = int(websocket.query_params["since"]) if "since" in websocket.query_params else None
+    except ValueError:
+        since = None
 
-                new_lines = await file.read()
-                if new_lines.strip():
-                    new_content += new_lines
+    subscription = logtail.Subscription(log_tailer, since)
+    receive = asyncio.create_task(websocket.receive())
+    try:
+        missed = await subscription.catch_up()
+        if missed is not None:
+            await websocket.send_json(missed)
 
-                if new_content.strip():
-                    await websocket.send_text(new_content)
+        while True:
+            chunk = asyncio.create_task(subscription.get())
+            await asyncio.wait({chunk, receive}, return_when=asyncio.FIRST_COMPLETED)
 
-                    if do_update_state:
-                        last_line = previous_line
-                        last_position = position
-                    else:
-                        last_line = ""
-                        last_position = 0
-    except asyncio.CancelledError as e:
+            if not chunk.done():
+                chunk.cancel()
+                break
+
+            message = chunk.result()
+            if message is None:
+                await websocket.close(code=1000 if shutdown_event.is_set() else 1013)
+                break
+
+            await websocket.send_json(message)
+    except WebSocketDisconnect as e:
         log.debug(f"Exception: {type(e).__name__}")
+    except Exception as e:
+        log.debug(f"Exception: {type(e).__name__}: {e}")
+    finally:
+        subscription.close()
+        receive.cancel()
+
+        async with connections_lock:
+            if websocket in active_connections:
+                active_connections.remove(websocket)
+                log.debug("WebSocket removed from active connections")
+
+
+async def progress_update(websocket: WebSocket):
+    """Send the state of running jobs over WebSocket connection whenever it changes.
+
+    The first message contains all running and paused jobs, each following message
+    a single job. A job with a status other than `running` or `paused` has ended.
+    Clients are not expected to send any messages.
+    """
+    await websocket.accept()
+    log.debug(f"Accepted WebSocket connection: {websocket}")
+
+    async with connections_lock:
+        active_connections.add(websocket)
+        log.debug("WebSocket added to active connections")
+
+    events = scheduler.subscribe()
+    receive = asyncio.create_task(websocket.receive())
+    shutdown = asyncio.create_task(shutdown_event.wait())
+    try:
+        await websocket.send_json({"jobs": scheduler.snapshot()})
+
+        while True:
+            event = asyncio.create_task(events.get())
+            await asyncio.wait({event, receive, shutdown}, return_when=asyncio.FIRST_COMPLETED)
+
+            if not event.done():
+                event.cancel()
+                break
+
+            await websocket.send_json({"job": event.result()})
     except WebSocketDisconnect as e:
         log.debug(f"Exception: {type(e).__name__}")
     except Exception as e:
         log.debug(f"Exception: {type(e).__name__}: {e}")
     finally:
+        scheduler.unsubscribe(events)
+        receive.cancel()
+        shutdown.cancel()
+
         async with connections_lock:
             if websocket in active_connections:
                 active_connections.remove(websocket)
                 log.debug("WebSocket removed from active connections")
 
 
+async def event_stream(request: Request):
+    """Stream log lines and job updates as Server-Sent Events.
+
+    Sends the same messages as `/ws/logs` as `log` events, with the `end` offset as
+    the event ID, and the same messages as `/ws/progress` as `jobs` and `job` events.
+    A client that reconnects with the `Last-Event-ID` header (or `?since=<offset>`)
+    first receives the lines it has missed. A comment is sent as a heartbeat when
+    there have been no events for `SSE_HEARTBEAT_INTERVAL` seconds.
+    """
+    since = request.headers.get("last-event-id") or request.query_params.get("since")
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        since = None
+
+    async def events():
+        subscription = logtail.Subscription(log_tailer, since)
+        updates = scheduler.subscribe()
+        shutdown = asyncio.create_task(shutdown_event.wait())
+        chunk = asyncio.create_task(subscription.get())
+        update = asyncio.create_task(updates.get())
+        try:
+            yield format_event("jobs", scheduler.snapshot())
+
+            missed = await subscription.catch_up()
+            if missed is not None:
+                yield format_event("log", missed, missed["end"])
+
+            while True:
+                done, _ = await asyncio.wait(
+                    {chunk, update, shutdown},
+                    timeout=SSE_HEARTBEAT_INTERVAL,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if shutdown in done:
+                    break
+
+                if chunk in done:
+                    message = chunk.result()
+                    if message is None:
+                        break
+
+                    yield format_event("log", message, message["end"])
+                    chunk = asyncio.create_task(subscription.get())
+
+                if update in done:
+                    yield format_event("job", update.result())
+                    update = asyncio.create_task(updates.get())
+        finally:
+            subscription.close()
+            scheduler.unsubscribe(updates)
+
+            for task in (shutdown, chunk, update):
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def format_event(event: str, data: Any, event_id: int | None = None):
+    """Return a Server-Sent Event with JSON data."""
+    lines = [f"event: {event}"]
+
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+
+    lines.append(f"data: {json.dumps(data)}")
+
+    return "\n".join(lines) + "\n\n"
+
+
+async def watch_config():
+    """Reload the gallery-dl configuration whenever a configuration file changes."""
+    directories = config_cache.directories()
+    if not directories:
+        return
+
+    paths = set(config_cache.paths)
+    watchfiles = await asyncio.to_thread(importlib.import_module, "watchfiles")
+
+    async for _ in watchfiles.awatch(
+        *directories,
+        watch_filter=lambda change, path: path in paths,
+        recursive=False,
+    ):
+        if await asyncio.to_thread(config_cache.refresh):
+            log.info("Reloaded gallery-dl configuration")
+
+
+async def prestart():
+    """Prepare for the first downloads and page requests in the background after startup."""
+    try:
+        await asyncio.to_thread(download.prestart, mp_context)
+        await asyncio.to_thread(jobs.get_host, "https://example.com/")  # import extractors
+        await asyncio.to_thread(get_templates)
+    except Exception as e:
+        log.error(f"Exception: {type(e).__name__}: {e}")
+
+    log.debug(f"Prestart finished after {(time.monotonic() - utils.START_TIME) * 1000:.0f} ms")
+
+
 @asynccontextmanager
 async def lifespan(app: Starlette):
     """Run server startup and shutdown tasks."""
@@ -302,11 +887,27 @@ async def lifespan(app: Starlette):
     uvicorn_log.info(f"Starting {type(app).__name__} application.")
 
     await shutdown_override()
+    output.log_writer.configure_rotation(
+        custom_args.log_max_size * 1024 * 1024,
+        custom_args.log_max_age * 24 * 60 * 60,
+        custom_args.log_backups,
+    )
+    await asyncio.to_thread(config_cache.refresh)
+
+    global prestart_task
+    prestart_task = asyncio.create_task(prestart())
+
+    scheduler.start()
+    config_watcher = asyncio.create_task(watch_config())
+
+    log.debug(f"Server ready after {(time.monotonic() - utils.START_TIME) * 1000:.0f} ms")
     try:
         yield
     except asyncio.CancelledError:
         pass
     finally:
+        config_watcher.cancel()
+
         if utils.CONTAINER and os.path.isdir("/config"):
             if os.path.isfile(log_file) and os.path.getsize(log_file) > 0:
                 dst_dir = "/config/logs"
@@ -314,7 +915,7 @@ async def lifespan(app: Starlette):
                 os.makedirs(dst_dir, exist_ok=True)
 
                 dst = os.path.join(dst_dir, "app_" + time.strftime("%Y-%m-%d_%H-%M-%S") + ".log")
-                shutil.copy2(log_file, dst)
+                await asyncio.to_thread(shutil.copy2, log_file, dst)
 
 
 async def shutdown_override():
@@ -351,6 +952,10 @@ async def shutdown_handler():
         shutdown_event.set()
         log.debug("Set shutdown event")
 
+    log_tailer.close()
+
+    await scheduler.drain(custom_args.drain_timeout)
+
     await close_connections()
     output.close_handlers()
 
@@ -389,21 +994,57 @@ class CSPMiddleware(BaseHTTPMiddleware):
         return response
 
 
-templates = Jinja2Templates(directory=utils.resource_path("templates"))
-
 active_connections: set[WebSocket] = set()
 connections_lock = asyncio.Lock()
 shutdown_event = asyncio.Event()
 shutdown_in_progress = False
+prestart_task: asyncio.Task[None] | None = None
+
+mp_context = download.get_context(custom_args.start_method)
+config_cache = config.ConfigCache()
+log_index = logindex.LineIndex(log_file)
+log_tailer = logtail.LogTailer(log_file)
+
+job_log_dir = utils.get_job_log_dir(log_file)
+job_log_handler = (
+    output.setup_job_file_handler(job_log_dir, log, jobs.log) if custom_args.job_logs else None
+)
+
+job_store = store.JobStore(utils.get_db_file_path(log_file))
+scheduler = jobs.JobScheduler(
+    download_task,
+    custom_args.max_workers,
+    job_store,
+    custom_args.host_max_workers,
+    custom_args.host_delay,
+    custom_args.dedupe_ttl,
+    custom_args.job_timeout,
+    custom_args.stall_timeout,
+    custom_args.memory_limit,
+)
+
+register_metrics()
 
 routes = [
     Route("/", endpoint=redirect, methods=["GET"]),
     Route("/gallery-dl", endpoint=homepage, methods=["GET"]),
     Route("/gallery-dl/q", endpoint=submit_form, methods=["POST"]),
+    Route("/gallery-dl/q/batch", endpoint=submit_batch, methods=["POST"]),
+    Route("/gallery-dl/jobs", endpoint=list_jobs, methods=["GET"]),
+    Route("/gallery-dl/jobs/{job_id:int}", endpoint=get_job, methods=["GET"]),
+    Route("/gallery-dl/jobs/{job_id:int}", endpoint=cancel_job, methods=["DELETE"]),
+    Route("/gallery-dl/jobs/{job_id:int}/log", endpoint=get_job_log, methods=["GET"]),
+    Route("/gallery-dl/jobs/{job_id:int}/pause", endpoint=pause_job, methods=["POST"]),
+    Route("/gallery-dl/jobs/{job_id:int}/resume", endpoint=resume_job, methods=["POST"]),
+    Route("/gallery-dl/progress", endpoint=get_progress, methods=["GET"]),
     Route("/gallery-dl/logs", endpoint=log_route, methods=["GET"]),
     Route("/gallery-dl/logs/clear", endpoint=clear_logs, methods=["POST"]),
+    Route("/gallery-dl/logs/lines", endpoint=log_lines, methods=["GET"]),
     Route("/stream/logs", endpoint=log_stream, methods=["GET"]),
+    Route("/stream/events", endpoint=event_stream, methods=["GET"]),
+    Route("/metrics", endpoint=get_metrics, methods=["GET"]),
     WebSocketRoute("/ws/logs", endpoint=log_update),
+    WebSocketRoute("/ws/progress", endpoint=progress_update),
     Mount("/static", app=StaticFiles(directory=utils.resource_path("static")), name="static"),
 ]
 
@@ -419,7 +1060,7 @@ csp_policy = (
 )
 
 middleware = [
-    Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["POST"]),
+    Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["POST", "DELETE"]),
     Middleware(CSPMiddleware, csp_policy=csp_policy),
 ]
 
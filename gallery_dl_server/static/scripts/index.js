@@ -172,10 +172,11 @@ form.onsubmit = async (event) => {
 let ws;
 let isConnected = false;
 let isPageAlive = true;
+let logsEnd = null;
 
 async function fetchLogs() {
   try {
-    const response = await fetch("/stream/logs", {
+    const response = await fetch("/gallery-dl/logs/lines?tail=1000", {
       method: "GET",
       headers: {
         "Cache-Control": "no-cache, no-store, must-revalidate",
@@ -188,7 +189,10 @@ async function fetchLogs() {
       throw new Error(`Response status: ${response.status}`);
     }
 
-    const logs = await response.text();
+    const data = await response.json();
+    const logs = data.lines;
+
+    logsEnd = data.end;
 
     if (box.textContent != logs) {
       box.textContent = logs;
@@ -207,10 +211,8 @@ async function fetchLogs() {
 function connectWebSocket(allowReconnect = true) {
   const protocol = window.location.protocol === "https:" ? "wss://" : "ws://";
   const host = window.location.host;
-  const url = `${protocol}${host}/ws/logs`;
-
-  let lastLine = "";
-  let lastPos = localStorage.getItem("lastPos") ? parseInt(localStorage.getItem("lastPos")) : 0;
+  const since = logsEnd !== null ? `?since=${logsEnd}` : "";
+  const url = `${protocol}${host}/ws/logs${since}`;
 
   ws = new WebSocket(url);
 
@@ -220,40 +222,18 @@ function connectWebSocket(allowReconnect = true) {
   };
 
   ws.onmessage = (event) => {
-    const newLines = event.data.split("\n").filter(Boolean);
+    const data = JSON.parse(event.data);
+    logsEnd = data.end;
+
+    const newLines = data.lines.split("\n").filter(Boolean);
     if (!newLines.length) return;
 
     const lines = box.textContent.split("\n").filter(Boolean);
 
-    lastLine = lastPos ? lines[lastPos] : lines[lines.length - 1] || null;
-
-    const isLastLineProgress = lastLine?.includes("B/s");
-    const isNewLineProgress = newLines[0].includes("B/s");
-
-    if (newLines.length > 1 && isNewLineProgress && newLines[1].includes("B/s")) {
-      newLines.pop();
-    }
-
-    let progressUpdate = false;
-
-    if (isLastLineProgress && isNewLineProgress) {
-      progressUpdate = true;
-      lastPos = lastPos || lines.length - 1;
-      lines[lastPos] = newLines[0];
-    }
-    else if (isLastLineProgress && !isNewLineProgress) {
-      lastPos = 0;
-    }
-
-    lines.push(...newLines.slice(progressUpdate ? 1 : 0));
+    lines.push(...newLines);
 
     box.textContent = lines.join("\n") + "\n";
-
-    localStorage.setItem("lastPos", lastPos);
-
-    if (!progressUpdate || newLines.length > 1) {
-      box.scrollTop = box.scrollHeight;
-    }
+    box.scrollTop = box.scrollHeight;
   };
 
   ws.onerror = (event) => {
@@ -274,12 +254,153 @@ function connectWebSocket(allowReconnect = true) {
   };
 }
 
+const progressContainer = document.getElementById("container-progress");
+const progressJobs = new Map();
+
+let progressWs;
+
+function formatBytes(bytes) {
+  const units = ["B", "KiB", "MiB", "GiB", "TiB"];
+  let i = 0;
+
+  while (bytes >= 1024 && i < units.length - 1) {
+    bytes /= 1024;
+    i++;
+  }
+
+  return `${bytes.toFixed(i ? 1 : 0)} ${units[i]}`;
+}
+
+function formatDuration(seconds) {
+  seconds = Math.round(seconds);
+
+  const h = Math.floor(seconds / 3600);
+  const m = Math.floor((seconds % 3600) / 60);
+  const s = String(seconds % 60).padStart(2, "0");
+
+  return h ? `${h}:${String(m).padStart(2, "0")}:${s}` : `${m}:${s}`;
+}
+
+function describeProgress(job) {
+  const progress = job.progress;
+
+  if (job.status === "paused") {
+    return "Paused";
+  }
+
+  if (job.status === "resuming") {
+    return "Resuming";
+  }
+
+  if (!progress) {
+    return "Starting";
+  }
+
+  const parts = [];
+
+  if (progress.total) {
+    const percent = (progress.bytes / progress.total) * 100;
+    parts.push(`${percent.toFixed(1)}% of ${formatBytes(progress.total)}`);
+  }
+  else {
+    parts.push(formatBytes(progress.bytes));
+  }
+
+  if (progress.speed) {
+    parts.push(`at ${formatBytes(progress.speed)}/s`);
+  }
+
+  if (progress.eta !== null) {
+    parts.push(`ETA ${formatDuration(progress.eta)}`);
+  }
+
+  return parts.join(" ");
+}
+
+function renderProgress() {
+  const rows = [];
+
+  for (const job of progressJobs.values()) {
+    const row = document.createElement("div");
+    row.className = "progress-job mb-2";
+
+    const label = document.createElement("div");
+    label.className = "d-flex justify-content-between small";
+
+    const url = document.createElement("span");
+    url.className = "text-truncate me-2";
+    url.textContent = job.url;
+
+    const info = document.createElement("span");
+    info.className = "text-nowrap";
+    info.textContent = describeProgress(job);
+
+    label.append(url, info);
+
+    const bar = document.createElement("div");
+    bar.className = "progress";
+
+    const fill = document.createElement("div");
+    fill.className = "progress-bar";
+
+    const progress = job.progress;
+    const percent = progress?.total ? (progress.bytes / progress.total) * 100 : 0;
+    fill.style.width = `${Math.min(percent, 100)}%`;
+
+    bar.append(fill);
+    row.append(label, bar);
+    rows.push(row);
+  }
+
+  progressContainer.replaceChildren(...rows);
+  progressContainer.classList.toggle("d-none", !rows.length);
+}
+
+function updateJob(job) {
+  if (["running", "paused", "resuming"].includes(job.status)) {
+    progressJobs.set(job.id, job);
+  }
+  else {
+    progressJobs.delete(job.id);
+  }
+}
+
+function connectProgress() {
+  const protocol = window.location.protocol === "https:" ? "wss://" : "ws://";
+  const host = window.location.host;
+  const url = `${protocol}${host}/ws/progress`;
+
+  progressWs = new WebSocket(url);
+
+  progressWs.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+
+    if (data.jobs) {
+      progressJobs.clear();
+      data.jobs.forEach(updateJob);
+    }
+    else {
+      updateJob(data.job);
+    }
+
+    renderProgress();
+  };
+
+  progressWs.onclose = () => {
+    if (isPageAlive) {
+      setTimeout(connectProgress, 2000);
+    }
+  };
+}
+
 fetchLogs();
+connectProgress();
 
 window.onbeforeunload = () => {
   isPageAlive = false;
 
   ws.close(1000, "User is leaving the page");
+  progressWs.close(1000, "User is leaving the page");
 
   if (localStorage.getItem("logs") == "shown") {
     saveBox();
@@ -2,8 +2,28 @@ const logsContainer = document.getElementById("container-logs");
 const clearLogsButton = document.getElementById("clear-logs");
 const refreshLogsButton = document.getElementById("refresh-logs");
 
+let logsStart = Number(logsContainer.dataset.start);
+let isLoadingOlder = false;
+
 logsContainer.scrollTop = logsContainer.scrollHeight;
 
+async function fetchLines(query) {
+  const response = await fetch(`/gallery-dl/logs/lines?${query}`, {
+    method: "GET",
+    headers: {
+      "Cache-Control": "no-cache, no-store, must-revalidate",
+      "Pragma": "no-cache",
+      "Expires": "0"
+    }
+  });
+
+  if (!response.ok) {
+    throw new Error(`Response status: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
 clearLogsButton.onclick = async () => {
   clearLogsButton.disabled = true;
 
@@ -20,6 +40,7 @@ clearLogsButton.onclick = async () => {
     console.log(data);
 
     logsContainer.textContent = "Cleared logs.";
+    logsStart = 0;
   }
   catch (error) {
     console.error(error);
@@ -33,24 +54,11 @@ refreshLogsButton.onclick = async () => {
   refreshLogsButton.disabled = true;
 
   try {
-    const response = await fetch("/stream/logs", {
-      method: "GET",
-      headers: {
-        "Cache-Control": "no-cache, no-store, must-revalidate",
-        "Pragma": "no-cache",
-        "Expires": "0"
-      }
-    });
-
-    if (!response.ok) {
-      throw new Error(`Response status: ${response.status}`);
-    }
-
-    const logs = await response.text();
-    console.log(response);
+    const data = await fetchLines("tail=1000");
 
-    logsContainer.textContent = logs.length ? logs : "No logs to display.";
+    logsContainer.textContent = data.lines.length ? data.lines : "No logs to display.";
     logsContainer.scrollTop = logsContainer.scrollHeight;
+    logsStart = data.start;
   }
   catch (error) {
     console.error(error);
@@ -59,3 +67,24 @@ refreshLogsButton.onclick = async () => {
     refreshLogsButton.disabled = false;
   }
 };
+
+logsContainer.onscroll = async () => {
+  if (logsContainer.scrollTop > 0 || logsStart <= 0 || isLoadingOlder) return;
+
+  isLoadingOlder = true;
+
+  try {
+    const data = await fetchLines(`before=${logsStart}&limit=1000`);
+    const scrollHeight = logsContainer.scrollHeight;
+
+    logsContainer.prepend(data.lines);
+    logsContainer.scrollTop = logsContainer.scrollHeight - scrollHeight;
+    logsStart = data.start;
+  }
+  catch (error) {
+    console.error(error);
+  }
+  finally {
+    isLoadingOlder = false;
+  }
+};
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import json
+import os
+import sqlite3
+
+from contextlib import contextmanager
+from typing import Any
+
+from . import output
+
+log = output.initialise_logging(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    exit_code INTEGER,
+    files INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_id ON jobs (status, id);
+"""
+
+COLUMNS = (
+    "id",
+    "url",
+    "options",
+    "status",
+    "created",
+    "started",
+    "finished",
+    "exit_code",
+    "files",
+    "bytes",
+    "error",
+)
+
+MIGRATIONS = {
+    "error": "ALTER TABLE jobs ADD COLUMN error TEXT",
+}
+
+
+class JobStore:
+    """Persist download jobs in an SQLite database."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+
+        log.debug(f"Opened job database: {path}")
+
+    def migrate(self):
+        """Add columns that are missing from a database created by an older version."""
+        existing = {row["name"] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+
+        for column, statement in MIGRATIONS.items():
+            if column not in existing:
+                self.connection.execute(statement)
+                log.debug(f"Added column '{column}' to the job database")
+
+    def insert(self, url: str, options: dict[str, Any], status: str, created: float):
+        """Insert a new job and return its ID."""
+        cursor = self.connection.execute(
+            "INSERT INTO jobs (url, options, status, created) VALUES (?, ?, ?, ?)",
+            (url, json.dumps(options), status, created),
+        )
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    @contextmanager
+    def transaction(self):
+        """Group all statements inside the block into a single transaction."""
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        else:
+            self.connection.execute("COMMIT")
+
+    def spool(self):
+        """Return a temporary table for collecting a large list of unique URLs."""
+        return UrlSpool(self.connection)
+
+    def update(self, job_id: int, **fields: Any):
+        """Update the given columns of a job."""
+        columns = ", ".join(f"{key} = ?" for key in fields)
+
+        self.connection.execute(
+            f"UPDATE jobs SET {columns} WHERE id = ?",
+            (*fields.values(), job_id),
+        )
+
+    def get(self, job_id: int):
+        """Return a job as a dictionary or None if it does not exist."""
+        row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row_to_dict(row) if row else None
+
+    def query(self, status: str | None = None, before: int | None = None, limit: int = 100):
+        """Return the most recent jobs, optionally filtered by status.
+
+        Jobs are returned newest first; pass the lowest ID of a page as `before`
+        to fetch the next page.
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self.connection.execute(
+            f"SELECT * FROM jobs {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+
+        return [row_to_dict(row) for row in rows]
+
+    def unfinished(self, statuses: tuple[str, ...]):
+        """Return the jobs with any of the given statuses, oldest first."""
+        placeholders = ", ".join("?" for _ in statuses)
+
+        rows = self.connection.execute(
+            f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY id",
+            statuses,
+        )
+        for row in rows:
+            yield row_to_dict(row)
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+
+class UrlSpool:
+    """Collect unique URLs in a temporary table, keeping the order they were added in.
+
+    This keeps memory usage constant when importing large lists of URLs.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.table = f"temp.spool_{next(self._ids)}"
+        self.count = 0
+
+        self.connection.execute(
+            f"CREATE TABLE {self.table} "
+            "(seq INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, url TEXT NOT NULL)"
+        )
+
+    def add(self, urls: list[tuple[str, str]]):
+        """Add URLs with their keys, ignoring any whose key has already been added."""
+        before = self.connection.total_changes
+
+        self.connection.executemany(
+            f"INSERT OR IGNORE INTO {self.table} (key, url) VALUES (?, ?)",
+            urls,
+        )
+        self.count += self.connection.total_changes - before
+
+    def __iter__(self):
+        for (url,) in self.connection.execute(f"SELECT url FROM {self.table} ORDER BY seq"):
+            yield url
+
+    def close(self):
+        """Drop the temporary table."""
+        self.connection.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+
+def row_to_dict(row: sqlite3.Row):
+    """Convert a database row into a job dictionary."""
+    job = {key: row[key] for key in COLUMNS}
+    job["options"] = json.loads(job["options"])
+
+    started, finished = job["started"], job["finished"]
+    job["duration"] = finished - started if started and finished else None
+
+    return job
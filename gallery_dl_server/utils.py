@@ -1,9 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import codecs
+import functools
+import importlib
+import json
 import os
+import re
 import sys
+import time
 
-from importlib import metadata
+from typing import AsyncIterable
+from urllib.parse import urlsplit
 
 WINDOWS = os.name == "nt"
 DOCKER = os.path.isfile("/.dockerenv")
@@ -11,11 +18,15 @@ KUBERNETES = os.environ.get("KUBERNETES_SERVICE_HOST") is not None
 EXECUTABLE = bool(getattr(sys, "frozen", False))
 MEIPASS_PATH: str | None = getattr(sys, "_MEIPASS", None)
 PYTHON_VERSION = sys.version_info
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+START_TIME = time.monotonic()
 
 CONTAINER = DOCKER or KUBERNETES
 MEIPASS = MEIPASS_PATH is not None
 PYINSTALLER = EXECUTABLE and MEIPASS
 
+URL_PREFIX_PATTERN = re.compile(r"[a-z]+:https?://", re.IGNORECASE)
+
 
 def resource_path(relative_path: str):
     """Return absolute path to resource for frozen PyInstaller executable."""
@@ -28,7 +39,7 @@ def resource_path(relative_path: str):
 
 def get_log_file_path(log_dir: str):
     """Get log file path depending on the package location."""
-    is_installed = is_package_installed("gallery-dl-server")
+    is_installed = not log_dir and is_package_installed("gallery-dl-server")
 
     if log_dir or is_installed:
         filename = "gallery-dl-server.log"
@@ -44,6 +55,27 @@ def get_log_file_path(log_dir: str):
     return os.path.join(log_dir, filename)
 
 
+def get_db_file_path(log_file: str):
+    """Get job database path, using the mounted config directory in containers."""
+    if CONTAINER and os.path.isdir("/config"):
+        return os.path.join("/config", "gallery-dl-server.db")
+
+    return os.path.join(os.path.dirname(log_file), "gallery-dl-server.db")
+
+
+def get_job_log_dir(log_file: str):
+    """Get the directory for job log files, using the mounted config directory in containers."""
+    if CONTAINER and os.path.isdir("/config"):
+        return os.path.join("/config", "logs", "jobs")
+
+    return os.path.join(os.path.dirname(log_file), "jobs")
+
+
+def get_job_log_path(directory: str, job_id: int):
+    """Get the path of the log file for a job."""
+    return os.path.join(directory, f"{job_id}.log")
+
+
 def dirname_parent(path: str):
     """Return grandparent directory of the given path."""
     return os.path.dirname(os.path.dirname(path))
@@ -66,11 +98,36 @@ def is_package(package_name: str):
     return os.path.isdir(path) and os.path.isfile(os.path.join(path, "__init__.py"))
 
 
+@functools.cache
 def is_package_installed(installed_name: str):
     """Check if the package is installed in the current environment and not
     in the current working directory."""
-    installed = {dist.metadata["Name"] for dist in metadata.distributions()}
-    return installed_name in installed if not is_package(get_package_name()) else False
+    if is_package(get_package_name()):
+        return False
+
+    from importlib import metadata
+
+    try:
+        metadata.distribution(installed_name)
+    except metadata.PackageNotFoundError:
+        return False
+
+    return True
+
+
+@functools.cache
+def get_version(distribution_name: str, module_name: str):
+    """Return the version of an installed distribution without importing it.
+
+    Falls back to the `__version__` of a module, e.g. in a frozen executable
+    without package metadata.
+    """
+    from importlib import metadata
+
+    try:
+        return metadata.version(distribution_name)
+    except metadata.PackageNotFoundError:
+        return importlib.import_module(module_name).__version__
 
 
 def normalise_path(path: str):
@@ -91,3 +148,154 @@ def is_imported(module_name: str):
 def filter_integers(values: list[int | str | None]):
     """Return only the integer values in a list."""
     return [value for value in values if isinstance(value, int)]
+
+
+def get_rss(pid: int):
+    """Return the resident memory of a process and its descendants in bytes.
+
+    Returns None if it is not available. Only supported on Linux, where it is read
+    from `/proc`.
+    """
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as file:
+            rss = int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+    for child in get_children(pid):
+        rss += get_rss(child) or 0
+
+    return rss
+
+
+def get_children(pid: int):
+    """Return the IDs of the child processes of a process, read from `/proc`."""
+    children: list[int] = []
+
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", "rb") as file:
+                children.extend(int(child) for child in file.read().split())
+    except (OSError, ValueError):
+        pass
+
+    return children
+
+
+def is_url(url: str):
+    """Return whether a string is an http(s) URL with a host.
+
+    A gallery-dl extractor prefix such as `ytdl:` before the URL is allowed.
+    """
+    if URL_PREFIX_PATTERN.match(url):
+        url = url.partition(":")[2]
+
+    try:
+        parts = urlsplit(url)
+        return parts.scheme.lower() in ("http", "https") and bool(parts.hostname)
+    except ValueError:
+        return False
+
+
+def normalise_url(url: str):
+    """Return the key used to compare URLs.
+
+    Whitespace is stripped and the scheme and host are lowercased. The path, query and
+    fragment are kept, as the fragment can decide which gallery-dl extractor is used.
+    """
+    url = url.strip()
+
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    userinfo, at, host = parts.netloc.rpartition("@")
+
+    return parts._replace(scheme=parts.scheme.lower(), netloc=userinfo + at + host.lower()).geturl()
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]):
+    """Decode a stream of UTF-8 bytes and yield its lines without line endings."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]):
+    """Decode a stream of bytes containing a JSON array and yield its elements.
+
+    Elements are decoded one at a time, so only the current element is held in memory.
+
+    Raises:
+        ValueError: If the stream is not a valid JSON array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="strict")
+    parser = json.JSONDecoder()
+    buffer = ""
+    started = finished = after_comma = False
+    iterator = aiter(chunks)
+    eof = False
+
+    while not finished:
+        buffer = buffer.lstrip()
+
+        if not started:
+            if buffer:
+                if buffer[0] != "[":
+                    raise ValueError("Expected a JSON array")
+                buffer = buffer[1:].lstrip()
+                started = True
+                continue
+        elif buffer.startswith("]"):
+            if after_comma:
+                raise ValueError("Trailing comma in JSON array")
+            buffer = buffer[1:]
+            finished = True
+            continue
+        elif buffer.startswith(","):
+            raise ValueError("Expected an array element before ','")
+        elif buffer:
+            try:
+                element, end = parser.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Invalid JSON array")
+            else:
+                rest = buffer[end:].lstrip()
+                if rest.startswith(","):
+                    buffer = rest[1:]
+                    after_comma = True
+                    yield element
+                    continue
+                if rest.startswith("]"):
+                    buffer = rest
+                    after_comma = False
+                    yield element
+                    continue
+                if rest or eof:
+                    raise ValueError("Expected ',' or ']' after array element")
+
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+
+        try:
+            buffer += decoder.decode(await anext(iterator))
+        except StopAsyncIteration:
+            buffer += decoder.decode(b"", final=True)
+            eof = True
+
+    if buffer.strip():
+        raise ValueError("Unexpected data after JSON array")
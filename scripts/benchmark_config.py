@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""Measure how long it takes to resolve the configuration of a job with a video-options profile.
+
+Usage: python scripts/benchmark_config.py [--runs N] [--resolves N] [--extractors N] [--root PATH]
+
+A configuration file with `--extractors` extractor sections is written to a temporary
+directory and used instead of the default configuration files. Each profile is resolved `--resolves` times per run:
+
+- `cached`: the overlay compiled for the profile is reused, as in the server.
+- `compiled`: the overlay cache is cleared before each resolve.
+- `reloaded`: the configuration file is parsed again before each resolve, as each
+  download process did before the overlay cache.
+
+`--root` selects the source tree to measure, e.g. a `git worktree` of another commit.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from typing import Any
+
+
+def make_config(extractors: int):
+    """Return a gallery-dl configuration with many extractor sections and ytdl options."""
+    conf: dict[str, Any] = {
+        "extractor": {
+            f"site{i}": {
+                "directory": ["{category}", "{user[name]}"],
+                "filename": "{id}_{num:>03}.{extension}",
+                "sleep-request": [1.0, 2.0],
+                "postprocessors": [{"name": "metadata", "event": "post"}],
+            }
+            for i in range(extractors)
+        },
+    }
+
+    conf["extractor"]["ytdl"] = {
+        "module": "yt_dlp",
+        "cmdline-args": ["--merge-output-format", "any", "--embed-metadata", "--extract-audio"],
+        "raw-options": {
+            "writethumbnail": False,
+            "postprocessors": [
+                {"key": "FFmpegExtractAudio", "preferredcodec": "best"},
+                {"key": "FFmpegMetadata"},
+            ],
+        },
+    }
+
+    return conf
+
+
+def time_resolves(cache: Any, video_options: str, resolves: int, mode: str):
+    """Return the mean number of seconds it takes to resolve a profile in the given mode."""
+    cache.resolve(video_options)
+
+    start = time.perf_counter()
+
+    for _ in range(resolves):
+        if mode == "compiled":
+            cache.overlays.clear()
+        elif mode == "reloaded":
+            cache.reload()
+
+        cache.resolve(video_options)
+
+    return (time.perf_counter() - start) / resolves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of runs (default: 5)")
+    parser.add_argument("--resolves", type=int, default=200, help="resolves per run (default: 200)")
+    parser.add_argument(
+        "--extractors", type=int, default=500, help="extractor sections (default: 500)"
+    )
+    parser.add_argument(
+        "--root",
+        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        help="source tree to measure (default: this repository)",
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_file = os.path.join(temp_dir, "config.json")
+
+        with open(config_file, "w", encoding="utf-8") as file:
+            json.dump(make_config(args.extractors), file)
+
+        os.environ["LOG_DIR"] = os.path.join(temp_dir, "logs")
+
+        from gallery_dl_server import config
+
+        config.get_default_configs = lambda: [config_file]
+
+        # messages about the files found would otherwise be logged on every reload
+        config.log.disabled = True
+
+        cache = config.ConfigCache()
+        if cache.resolve("none")[0] is None:
+            raise RuntimeError("Configuration file was not loaded")
+
+        for video_options in config.VIDEO_OPTIONS:
+            print(f"{video_options} ({args.extractors} extractors):")
+
+            for mode in ("cached", "compiled", "reloaded"):
+                times = [
+                    time_resolves(cache, video_options, args.resolves, mode)
+                    for _ in range(args.runs)
+                ]
+                us = sorted(t * 1_000_000 for t in times)
+                print(
+                    f"  {mode:8s} median {statistics.median(us):9.1f} µs"
+                    f"  min {us[0]:9.1f} µs  max {us[-1]:9.1f} µs  ({args.runs} runs)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+"""Measure how many log records download processes can send to the server per second.
+
+Usage: python scripts/benchmark_logging.py [--runs N] [--jobs N] [--records N] [--root PATH]
+
+Each job is a spawned process that logs a yt-dlp progress line `--records` times
+through the same pipe handler as a download process, while the parent receives and
+rebuilds the records of all jobs on its event loop, as the server does. `records` only
+rebuilds them, `lines` also writes them with the server logger to a log file and a
+console stream, and counts the lines once they have all been written.
+
+`--root` selects the source tree to measure, e.g. a `git worktree` of an older
+commit, so the results can be compared before and after a change.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+PROGRESS_LINE = "[download]  42.3% of ~  12.34MiB at    1.23MiB/s ETA 00:07 (frag 12/30)"
+
+
+def send_records(connection: Connection, barrier: Any, count: int):
+    """Log `count` records through a pipe handler once all jobs are ready."""
+    from gallery_dl_server import output
+
+    handler = output.PipeHandler(connection)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logger = logging.getLogger("benchmark")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    barrier.wait()
+
+    for _ in range(count):
+        logger.info(PROGRESS_LINE)
+
+    connection.close()
+
+
+def get_record_factory():
+    """Return the function that rebuilds a record sent by a download process."""
+    from gallery_dl_server import output
+
+    if hasattr(output, "tuple_to_record"):
+        return output.tuple_to_record
+
+    return output.dict_to_record
+
+
+async def receive(connections: list[Connection], handle: Callable[[Any], None]):
+    """Pass every message from the connections to `handle` until they are all closed.
+
+    Tasks created while handling the messages are awaited as well.
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    pending = set(connections)
+
+    def read(connection: Connection):
+        while connection.poll():
+            try:
+                message = connection.recv()
+            except EOFError:
+                loop.remove_reader(connection.fileno())
+                pending.discard(connection)
+                if not pending:
+                    done.set_result(None)
+                return
+            handle(message)
+
+    for connection in connections:
+        loop.add_reader(connection.fileno(), read, connection)
+
+    await done
+
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    await asyncio.gather(*tasks)
+
+
+def time_jobs(jobs: int, count: int, log_file: str | None = None):
+    """Return the number of seconds it takes to send and rebuild the records of all jobs.
+
+    With a `log_file`, the records are also written with the server logger, to the file
+    and to a console stream.
+    """
+    from gallery_dl_server import output
+
+    mp_context = multiprocessing.get_context("spawn")
+    barrier = mp_context.Barrier(jobs + 1)
+    make_record = get_record_factory()
+
+    processes = []
+    receivers = []
+
+    for _ in range(jobs):
+        receiver, sender = mp_context.Pipe(duplex=False)
+        process = mp_context.Process(target=send_records, args=(sender, barrier, count))
+        process.start()
+        sender.close()
+
+        processes.append(process)
+        receivers.append(receiver)
+
+    received = 0
+
+    with open(os.devnull, "w") as console:
+        logger = None
+        if log_file:
+            logger = output.initialise_logging("benchmark-server", stream=console, file=log_file)
+
+        def handle(message: Any):
+            nonlocal received
+            record = make_record(message)
+            received += 1
+
+            if logger is not None:
+                logger.handle(record)
+
+        barrier.wait()
+        start = time.perf_counter()
+        asyncio.run(receive(receivers, handle))
+
+        if logger is not None:
+            for handler in logger.handlers:
+                handler.flush()
+
+        elapsed = time.perf_counter() - start
+
+        if logger is not None:
+            for handler in logger.handlers:
+                handler.close()
+
+    for process in processes:
+        process.join()
+
+    if received != jobs * count:
+        raise RuntimeError(f"Received {received} of {jobs * count} records")
+
+    if log_file:
+        with open(log_file, encoding="utf-8") as file:
+            written = sum(1 for _ in file)
+        if written != received:
+            raise RuntimeError(f"Wrote {written} of {received} lines")
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of runs (default: 5)")
+    parser.add_argument("--jobs", type=int, default=20, help="concurrent jobs (default: 20)")
+    parser.add_argument(
+        "--records", type=int, default=5000, help="records logged by each job (default: 5000)"
+    )
+    parser.add_argument(
+        "--root",
+        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        help="source tree to measure (default: this repository)",
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        os.environ["LOG_DIR"] = log_dir
+
+        records = [time_jobs(args.jobs, args.records) for _ in range(args.runs)]
+        lines = [
+            time_jobs(args.jobs, args.records, os.path.join(log_dir, f"lines-{i}.log"))
+            for i in range(args.runs)
+        ]
+
+    for name, times in (("records", records), ("lines", lines)):
+        rates = sorted(args.jobs * args.records / t for t in times)
+        print(
+            f"{name:8s} median {statistics.median(rates):9,.0f}/s"
+            f"  min {rates[0]:9,.0f}/s  max {rates[-1]:9,.0f}/s"
+            f"  ({args.runs} runs, {args.jobs} jobs x {args.records:,} records)"
+        )
+
+
+if __name__ == "__main__":
+    main()
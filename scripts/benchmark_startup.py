@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""Measure how long it takes to import the server and for it to start serving requests.
+
+Usage: python scripts/benchmark_startup.py [--runs N] [--start-method METHOD ...] [--root PATH]
+
+For each `--start-method` (default: all available), a server is started, a job is
+submitted once its background prestart has finished, and the time until the first log
+record of the download process reaches the log file is measured. The process reports
+how long it took to be ready itself, which is shown as `ready`.
+
+`--root` selects the source tree to measure, e.g. a `git worktree` of an older
+commit, so startup times can be compared before and after a change.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+IMPORT_CODE = (
+    "import time; start = time.perf_counter(); import gallery_dl_server.server; "
+    "print(time.perf_counter() - start)"
+)
+READY_PATTERN = re.compile(r"Download process ready after (\d+) ms")
+
+# no extractor matches this URL, so the job fails without any network access
+JOB_URL = "https://example.invalid/benchmark"
+
+
+def get_free_port():
+    """Return a free TCP port on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_import(root: str, env: dict[str, str]):
+    """Return the number of seconds it takes to import the server module."""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_CODE],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def start_server(root: str, env: dict[str, str]):
+    """Start the server on a free port and return its process and base URL."""
+    port = get_free_port()
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gallery_dl_server", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    return process, f"http://127.0.0.1:{port}"
+
+
+def stop_server(process: subprocess.Popen[bytes]):
+    """Stop the server and wait for it to exit."""
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def wait_for_server(process: subprocess.Popen[bytes], url: str, start: float, timeout: float):
+    """Wait until the server answers a request."""
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}/gallery-dl/jobs", timeout=1):
+                return
+        except OSError:
+            if process.poll() is not None or time.perf_counter() - start > timeout:
+                raise RuntimeError("Server did not start")
+            time.sleep(0.005)
+
+
+def wait_for_line(
+    process: subprocess.Popen[bytes], path: str, pattern: re.Pattern[str], timeout: float
+):
+    """Wait until a line matching the pattern is written to a log file and return the match."""
+    deadline = time.perf_counter() + timeout
+    offset = 0
+    buffer = ""
+
+    while True:
+        try:
+            with open(path, encoding="utf-8") as file:
+                file.seek(offset)
+                buffer += file.read()
+                offset = file.tell()
+        except FileNotFoundError:
+            pass
+
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            match = pattern.search(line)
+            if match:
+                return match
+
+        if process.poll() is not None or time.perf_counter() > deadline:
+            raise RuntimeError(f"No line matching {pattern.pattern!r} in the log file")
+        time.sleep(0.001)
+
+
+def time_startup(root: str, env: dict[str, str], timeout=60.0):
+    """Return the number of seconds from starting the server until it answers a request."""
+    start = time.perf_counter()
+    process, url = start_server(root, env)
+
+    try:
+        wait_for_server(process, url, start, timeout)
+        return time.perf_counter() - start
+    finally:
+        stop_server(process)
+
+
+def time_first_record(root: str, env: dict[str, str], start_method: str, timeout=60.0):
+    """Return the number of seconds from submitting a job until the first log record of its
+    download process is written, and the number of seconds the process took to be ready.
+    """
+    log_dir = tempfile.mkdtemp(dir=env["LOG_DIR"])
+    log_file = os.path.join(log_dir, "gallery-dl-server.log")
+    env = dict(env, LOG_DIR=log_dir, SERVER_LOG_LEVEL="debug", START_METHOD=start_method)
+
+    process, url = start_server(root, env)
+
+    try:
+        wait_for_server(process, url, time.perf_counter(), timeout)
+        wait_for_line(process, log_file, re.compile("Prestart finished"), timeout)
+
+        data = urllib.parse.urlencode({"url": JOB_URL}).encode()
+        start = time.perf_counter()
+
+        with urllib.request.urlopen(f"{url}/gallery-dl/q", data, timeout=10) as response:
+            if not json.load(response)["success"]:
+                raise RuntimeError("Job was not submitted")
+
+        match = wait_for_line(process, log_file, READY_PATTERN, timeout)
+        return time.perf_counter() - start, int(match[1]) / 1000
+    finally:
+        stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of runs (default: 5)")
+    parser.add_argument(
+        "--start-method",
+        action="append",
+        choices=multiprocessing.get_all_start_methods(),
+        help="start method of download processes (default: all available)",
+    )
+    parser.add_argument(
+        "--root",
+        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        help="source tree to measure (default: this repository)",
+    )
+    args = parser.parse_args()
+    start_methods = args.start_method or multiprocessing.get_all_start_methods()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        env = dict(os.environ, LOG_DIR=log_dir, PYTHONPATH=args.root)
+
+        time_import(args.root, env)  # warm up the bytecode cache
+
+        results = {
+            "import": [time_import(args.root, env) for _ in range(args.runs)],
+            "startup": [time_startup(args.root, env) for _ in range(args.runs)],
+        }
+
+        for start_method in start_methods:
+            runs = [time_first_record(args.root, env, start_method) for _ in range(args.runs)]
+            results[f"{start_method} record"] = [record for record, _ in runs]
+            results[f"{start_method} ready"] = [ready for _, ready in runs]
+
+    width = max(len(name) for name in results)
+
+    for name, times in results.items():
+        ms = sorted(t * 1000 for t in times)
+        print(
+            f"{name:{width}s} median {statistics.median(ms):7.0f} ms"
+            f"  min {ms[0]:7.0f} ms  max {ms[-1]:7.0f} ms  ({args.runs} runs)"
+        )
+
+
+if __name__ == "__main__":
+    main()
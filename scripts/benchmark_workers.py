@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""Measure how long download processes take to start and how much memory they use alone.
+
+Usage: python scripts/benchmark_workers.py [--runs N] [--start-method METHOD ...] [--root PATH]
+
+For each `--start-method` (default: all available), the multiprocessing context of the
+server is prepared as at startup and `--runs` processes are started one after another.
+Each process imports the modules a download needs and reports the time since it was
+started, and its private memory from `/proc/self/smaps_rollup` (Linux only), i.e. the
+memory that is not shared with the server or a forkserver template.
+
+`--root` selects the source tree to measure, e.g. a `git worktree` of an older
+commit, so the results can be compared before and after a change.
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from multiprocessing.connection import Connection
+
+MODULES = ["gallery_dl_server.download", "gallery_dl.job", "gallery_dl.ytdl", "yt_dlp"]
+
+
+def get_private_memory():
+    """Return the private memory of this process in bytes, or `None` if it is unknown."""
+    try:
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as file:
+            lines = file.readlines()
+    except OSError:
+        return None
+
+    kilobytes = 0
+    for line in lines:
+        if line.startswith(("Private_Clean:", "Private_Dirty:")):
+            kilobytes += int(line.split()[1])
+
+    return kilobytes * 1024
+
+
+def run_worker(connection: Connection, start_time: float):
+    """Import the modules needed by a download and report the time taken and memory used."""
+    for module_name in MODULES:
+        importlib.import_module(module_name)
+
+    connection.send((time.time() - start_time, get_private_memory()))
+    connection.close()
+
+
+def time_workers(start_method: str, runs: int):
+    """Return the start times in seconds and private memory in bytes of `runs` processes."""
+    from gallery_dl_server import download
+
+    context = download.get_context(start_method)
+    download.prestart(context)
+
+    results = []
+
+    # the first process also waits for the forkserver template to import its modules
+    for _ in range(runs + 1):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=run_worker, args=(sender, time.time()))
+        process.start()
+        sender.close()
+
+        results.append(receiver.recv())
+        receiver.close()
+        process.join()
+
+    return results[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="number of runs (default: 10)")
+    parser.add_argument(
+        "--start-method",
+        action="append",
+        choices=multiprocessing.get_all_start_methods(),
+        help="start method of download processes (default: all available)",
+    )
+    parser.add_argument(
+        "--root",
+        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        help="source tree to measure (default: this repository)",
+    )
+    args = parser.parse_args()
+    start_methods = args.start_method or multiprocessing.get_all_start_methods()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        os.environ["LOG_DIR"] = log_dir
+
+        for start_method in start_methods:
+            results = time_workers(start_method, args.runs)
+
+            ms = sorted(seconds * 1000 for seconds, _ in results)
+            line = (
+                f"{start_method:10s} ready median {statistics.median(ms):6.0f} ms"
+                f"  min {ms[0]:6.0f} ms  max {ms[-1]:6.0f} ms"
+            )
+
+            memory = [size for _, size in results if size is not None]
+            if memory:
+                line += f"  private {statistics.median(memory) / 1024 / 1024:6.1f} MiB"
+
+            print(f"{line}  ({args.runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from gallery_dl_server import server, store, utils
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+def parse(*chunks: bytes):
+    return asyncio.run(collect(utils.iter_json_array(stream(*chunks))))
+
+
+def spool_urls(*urls):
+    spool = store.UrlSpool(sqlite3.connect(":memory:"))
+
+    async def main():
+        async def iter_urls():
+            for url in urls:
+                yield url
+
+        await server.spool_urls(iter_urls(), spool)
+
+    asyncio.run(main())
+    return list(spool)
+
+
+def test_json_array_split_across_chunks():
+    assert parse(b'[ "https://a.example/1",', b' "https://b.exa', b"mple/\xc3", b'\xa9" ]') == [
+        "https://a.example/1",
+        "https://b.example/é",
+    ]
+    assert parse(b"[]") == []
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b'["a",]', b'["a" , ]', b"[,]", b'[,"a"]', b'["a",,"b"]', b'["a"', b'["a"] x', b'{"a": 1}'],
+)
+def test_invalid_json_array_is_rejected(body):
+    with pytest.raises(ValueError):
+        parse(body)
+
+
+def test_spool_skips_comments_and_duplicates():
+    assert spool_urls(
+        " https://a.example/1 ",
+        "",
+        "# comment",
+        "HTTPS://A.EXAMPLE/1",
+        "ytdl:https://b.example/2",
+    ) == ["https://a.example/1", "ytdl:https://b.example/2"]
+
+
+@pytest.mark.parametrize(
+    "url", ["a", "ftp://a.example/1", "https://", "https:///path", "http://[::1"]
+)
+def test_spool_rejects_non_urls(url):
+    with pytest.raises(ValueError, match="Not a valid URL"):
+        spool_urls("https://a.example/1", url)
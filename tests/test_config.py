@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+
+from gallery_dl_server import config
+
+ALLOWED = ["directory", "filename", "extractor"]
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"directory": ["{_lit[..]}", "{_lit[..]}", "tmp"]},
+        {"directory": ["{_env[HOME]}"]},
+        {"directory": ["{'..'}"]},
+        {"directory": [".."]},
+        {"directory": [" .. "]},
+        {"directory": [".{id}."]},
+        {"directory": ["a/../../b"]},
+        {"directory": ["{id:?../../}"]},
+        {"directory": ["{category:.<2.0}", "{category:.<2.0}", "tmp"]},
+        {"directory": ["{category:.^2}"]},
+        {"directory": ["{category:.0}"]},
+        {"directory": ["{date:..}"]},
+        {"directory": ["{date:%Y..}"]},
+        {"filename": "{id:X5/../}"},
+        {"filename": "{title!j}.{extension}"},
+        {"filename": "{id.__class__}"},
+        {"filename": "\fE 1"},
+        {"extractor": {"twitter": {"directory": ["{_lit[..]}"]}}},
+    ],
+)
+def test_path_overrides_cannot_leave_base_directory(overrides):
+    with pytest.raises(ValueError):
+        config.validate_overrides(overrides, ALLOWED)
+
+
+def test_path_overrides_with_metadata_fields():
+    overrides = {
+        "directory": ["{category}", "{user[name]}", "{date:%Y-%m-%d}"],
+        "filename": "{num:03}_{title|id}.{extension}",
+    }
+
+    assert config.validate_overrides(overrides, ALLOWED) == overrides
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text(
+        json.dumps(
+            {
+                "extractor": {
+                    "twitter": {"directory": ["twitter"]},
+                    "ytdl": {
+                        "cmdline-args": ["--embed-metadata", "--extract-audio"],
+                        "raw-options": {"writethumbnail": False},
+                    },
+                }
+            }
+        )
+    )
+    monkeypatch.setattr(config, "get_default_configs", lambda: [str(path)])
+    return path
+
+
+def test_overlay_cache(config_file):
+    cache = config.ConfigCache()
+
+    conf, added, removed = cache.resolve("download-video")
+    assert conf["extractor"]["ytdl"]["cmdline-args"] == ["--embed-metadata"]
+    assert added == []
+    assert removed
+
+    # the overlay is shared by later jobs and the parsed configuration is unchanged
+    assert cache.resolve("download-video")[0] is conf
+    assert conf["extractor"]["twitter"] is cache.conf["extractor"]["twitter"]
+    assert cache.conf["extractor"]["ytdl"]["cmdline-args"] == [
+        "--embed-metadata",
+        "--extract-audio",
+    ]
+
+    # names that are not profiles are not cached
+    assert cache.resolve("none")[0] is cache.conf
+    assert cache.resolve("x" * 100)[0] is cache.conf
+    assert list(cache.overlays) == ["download-video"]
+
+
+def test_overlay_cache_with_overrides(config_file):
+    cache = config.ConfigCache()
+    base = cache.resolve("extract-audio")[0]
+
+    conf = cache.resolve("extract-audio", {"directory": ["a"]})[0]
+    assert conf["extractor"]["directory"] == ["a"]
+    assert conf["extractor"]["ytdl"] is base["extractor"]["ytdl"]
+    assert "directory" not in base["extractor"]
+
+
+def test_overlay_cache_is_rebuilt_when_the_file_changes(config_file):
+    cache = config.ConfigCache()
+    old = cache.resolve("download-video")[0]
+
+    config_file.write_text(json.dumps({"extractor": {"ytdl": {"cmdline-args": ["-f", "-x"]}}}))
+    os.utime(config_file, ns=(0, 0))
+
+    new = cache.resolve("download-video")[0]
+    assert new is not old
+    assert new["extractor"]["ytdl"]["cmdline-args"] == ["-f"]
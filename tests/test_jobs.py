@@ -0,0 +1,266 @@
+import asyncio
+import multiprocessing
+import time
+
+from collections import OrderedDict
+
+import pytest
+
+from gallery_dl_server import jobs, store, utils
+
+HOSTS = ["a.example", "b.example"]
+ACTIVE = (jobs.RUNNING, jobs.PAUSED, jobs.RESUMING)
+
+
+@pytest.fixture(autouse=True)
+def categories(monkeypatch):
+    # hostnames without a gallery-dl extractor, so no extractor is looked up
+    for host in HOSTS:
+        monkeypatch.setitem(jobs.categories, host, None)
+
+
+class Target:
+    """Download target that keeps jobs running until they are finished by the test,
+    or stopped like a download process would be.
+    """
+
+    def __init__(self):
+        self.started: list[int] = []
+        self.finished: set[int] = set()
+
+    async def __call__(self, job: jobs.Job):
+        self.started.append(job.id)
+
+        while job.id not in self.finished and job.status in ACTIVE:
+            await asyncio.sleep(0.005)
+
+        return 0
+
+
+async def settle():
+    await asyncio.sleep(0.05)
+
+
+def make_scheduler(path=":memory:", **kwargs):
+    target = Target()
+    scheduler = jobs.JobScheduler(target, job_store=store.JobStore(path), **kwargs)
+    return scheduler, target
+
+
+def make_job(job_id=1, url="https://a.example/1"):
+    return jobs.Job(job_id, url, {}, created=0.0, host="a.example")
+
+
+def start_process():
+    process = multiprocessing.get_context("fork").Process(target=time.sleep, args=(30,))
+    process.start()
+    return process
+
+
+def test_elapsed_does_not_count_pauses():
+    job = make_job()
+    job.started = 100.0
+    job.paused_time = 10.0
+    assert job.elapsed(now=150.0) == 40.0
+
+    # a job that ends while paused does not count the open pause either
+    job.paused_at = 140.0
+    assert job.elapsed(now=150.0) == 30.0
+
+
+def test_host_limit():
+    async def main():
+        scheduler, target = make_scheduler(max_workers=3, host_max_workers=1)
+        scheduler.start()
+
+        a1, _ = await scheduler.submit("https://a.example/1", {})
+        a2, _ = await scheduler.submit("https://a.example/2", {})
+        b1, _ = await scheduler.submit("https://b.example/1", {})
+        await settle()
+        assert target.started == [a1, b1]
+
+        target.finished.add(a1)
+        await settle()
+        assert target.started == [a1, b1, a2]
+        assert scheduler.store.get(a1)["status"] == jobs.DONE
+
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_duplicates_are_coalesced():
+    async def main():
+        scheduler, target = make_scheduler(max_workers=1, dedupe_ttl=60)
+        scheduler.start()
+
+        first, duplicate = await scheduler.submit("https://a.example/1", {})
+        assert not duplicate
+        assert await scheduler.submit("HTTPS://A.EXAMPLE/1 ", {}) == (first, True)
+
+        # the same URL with other options is a different job
+        other, duplicate = await scheduler.submit("https://a.example/1", {"range": "1"})
+        assert not duplicate
+
+        ids, duplicates = await scheduler.submit_many(
+            ["https://a.example/1", "https://b.example/1"], {}
+        )
+        assert ids[0] == first
+        assert duplicates == 1
+
+        # a job that completed successfully is still a duplicate until the TTL expires
+        await settle()
+        target.finished.add(first)
+        await settle()
+        assert scheduler.store.get(first)["status"] == jobs.DONE
+        assert await scheduler.submit("https://a.example/1", {}) == (first, True)
+
+        scheduler.dedupe_ttl = 0
+        assert (await scheduler.submit("https://a.example/1", {}))[1] is False
+
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_cancel():
+    async def main():
+        scheduler, target = make_scheduler(max_workers=1)
+        scheduler.start()
+
+        running, _ = await scheduler.submit("https://a.example/1", {})
+        queued, _ = await scheduler.submit("https://a.example/2", {})
+        await settle()
+
+        assert scheduler.cancel(queued)
+        assert scheduler.store.get(queued)["status"] == jobs.CANCELLED
+        assert not scheduler.cancel(queued)
+
+        assert scheduler.cancel(running)
+        await settle()
+        assert scheduler.store.get(running)["status"] == jobs.CANCELLED
+        assert target.started == [running]
+
+        # the URL can be submitted again once its job is cancelled
+        assert (await scheduler.submit("https://a.example/1", {}))[1] is False
+
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_cancel_leaves_failed_job_alone():
+    async def main():
+        scheduler, target = make_scheduler(max_workers=1)
+        scheduler.start()
+
+        job_id, _ = await scheduler.submit("https://a.example/1", {})
+        await settle()
+
+        # a job that exceeded a limit and whose process is still exiting
+        job = scheduler.jobs[job_id]
+        scheduler.fail(job, "Exceeded the time limit of 1s")
+        assert not scheduler.cancel(job_id)
+
+        await settle()
+        result = scheduler.store.get(job_id)
+        assert result["status"] == jobs.FAILED
+        assert result["error"] == "Exceeded the time limit of 1s"
+
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+@pytest.mark.skipif(utils.WINDOWS, reason="pausing is not supported on Windows")
+def test_pause_and_resume():
+    async def main():
+        scheduler, target = make_scheduler(max_workers=1)
+        scheduler.start()
+
+        first, _ = await scheduler.submit("https://a.example/1", {})
+        second, _ = await scheduler.submit("https://a.example/2", {})
+        await settle()
+
+        job = scheduler.jobs[first]
+        process = job.process = start_process()
+
+        try:
+            assert scheduler.pause(first)
+            assert job.status == jobs.PAUSED
+
+            # the worker slot of the paused job is given to the next one
+            await settle()
+            assert target.started == [first, second]
+
+            assert scheduler.resume(first)
+            assert job.status == jobs.RESUMING
+            assert scheduler.store.get(first)["status"] == jobs.RESUMING
+            assert [job["id"] for job in scheduler.snapshot()] == [first, second]
+
+            target.finished.add(second)
+            await settle()
+            assert job.status == jobs.RUNNING
+            assert job.paused_at is None
+
+            assert scheduler.cancel(first)
+            process.join(5)
+            assert not process.is_alive()
+        finally:
+            process.kill()
+
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_drain_and_replay(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def run():
+        scheduler, target = make_scheduler(path, max_workers=1)
+        scheduler.start()
+
+        running, _ = await scheduler.submit("https://a.example/1", {})
+        queued, _ = await scheduler.submit("https://a.example/2", {})
+        await settle()
+
+        await scheduler.drain(0)
+        assert scheduler.store.get(running)["status"] == jobs.INTERRUPTED
+        assert scheduler.store.get(queued)["status"] == jobs.QUEUED
+        scheduler.store.close()
+
+        return running, queued
+
+    async def replay(running: int, queued: int):
+        scheduler, target = make_scheduler(path, max_workers=2)
+        scheduler.start()
+        await settle()
+
+        assert sorted(target.started) == [running, queued]
+        assert scheduler.store.get(running)["status"] == jobs.RUNNING
+
+        await scheduler.stop()
+
+    asyncio.run(replay(*asyncio.run(run())))
+
+
+def test_category_cache_is_bounded(monkeypatch):
+    found: list[str] = []
+
+    def find(url: str):
+        found.append(url)
+        return None
+
+    monkeypatch.setattr(jobs, "categories", OrderedDict())
+    monkeypatch.setattr(jobs, "CATEGORY_CACHE_SIZE", 2)
+    monkeypatch.setattr(jobs.extractor, "find", find)
+
+    for host in ("a.example", "b.example", "a.example", "c.example", "b.example"):
+        assert jobs.get_host(f"https://www.{host}/1") == host
+
+    # b.example was the least recently used host when c.example was added
+    assert found == [
+        f"https://www.{host}/1" for host in ("a.example", "b.example", "c.example", "b.example")
+    ]
+    assert list(jobs.categories) == ["c.example", "b.example"]
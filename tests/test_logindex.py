@@ -0,0 +1,41 @@
+from gallery_dl_server import logindex
+
+
+def test_line_longer_than_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(logindex, "CHUNK_SIZE", 16)
+    path = tmp_path / "app.log"
+    long_line = "x" * 100 + "\n"
+    path.write_text("first\n" + long_line + "last\n")
+
+    index = logindex.LineIndex(str(path), interval=2)
+
+    assert index.tail(10)["lines"] == "first\n" + long_line + "last\n"
+    assert index.tail(1)["lines"] == "last\n"
+
+
+def test_partial_long_line_is_indexed_once_complete(tmp_path, monkeypatch):
+    monkeypatch.setattr(logindex, "CHUNK_SIZE", 16)
+    path = tmp_path / "app.log"
+    path.write_text("first\n" + "x" * 50)
+
+    index = logindex.LineIndex(str(path))
+    assert index.tail(10)["lines"] == "first\n"
+
+    with open(path, "a") as file:
+        file.write("x" * 50 + "\nlast\n")
+
+    assert index.tail(2)["lines"] == "x" * 100 + "\nlast\n"
+
+
+def test_cleared_and_regrown_file(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"old line {i}\n" for i in range(10)))
+
+    index = logindex.LineIndex(str(path), interval=3)
+    assert index.tail(1)["lines"] == "old line 9\n"
+
+    with open(path, "w") as file:
+        file.write("".join(f"new {i}\n" for i in range(40)))
+
+    assert index.tail(5)["lines"] == "".join(f"new {i}\n" for i in range(35, 40))
+    assert index.lines == 40
@@ -0,0 +1,77 @@
+import asyncio
+
+from gallery_dl_server import logtail
+
+
+def write(path, text):
+    with open(path, "a") as file:
+        file.write(text)
+
+
+def test_client_ahead_of_tailer_gets_no_duplicates(tmp_path):
+    path = tmp_path / "app.log"
+    old = "".join(f"old {i}\n" for i in range(5))
+    path.write_text(old)
+
+    async def main():
+        tailer = logtail.LogTailer(str(path))
+        first = logtail.Subscription(tailer)
+
+        # the client read a page of lines that the tailer has not published yet
+        write(path, "new 0\n")
+        since = len(old) + len("new 0\n")
+        subscription = logtail.Subscription(tailer, since)
+        assert subscription.position < since
+
+        assert await subscription.catch_up() is None
+
+        await asyncio.sleep(0.3)
+        write(path, "new 1\n")
+        chunk = await asyncio.wait_for(subscription.get(), 5)
+
+        subscription.close()
+        first.close()
+        tailer.close()
+        return chunk
+
+    chunk = asyncio.run(main())
+    assert chunk["lines"] == "new 1\n"
+    assert chunk["start"] == len(old) + len("new 0\n")
+
+
+def test_client_behind_tailer_catches_up(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("line 0\nline 1\nline 2\n")
+
+    async def main():
+        tailer = logtail.LogTailer(str(path))
+        subscription = logtail.Subscription(tailer, since=len("line 0\n"))
+        missed = await subscription.catch_up()
+        subscription.close()
+        tailer.close()
+        return missed
+
+    assert asyncio.run(main())["lines"] == "line 1\nline 2\n"
+
+
+def test_offset_past_end_of_file_is_treated_as_rotation(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("after rotation\n")
+
+    async def main():
+        tailer = logtail.LogTailer(str(path))
+        subscription = logtail.Subscription(tailer, since=1000)
+        missed = await subscription.catch_up()
+        subscription.close()
+        tailer.close()
+        return missed
+
+    assert asyncio.run(main())["lines"] == "after rotation\n"
+
+
+def test_trim_chunk():
+    chunk = logtail.make_chunk(10, 22, b"line a\nline\n")
+
+    assert logtail.trim_chunk(chunk, 22) is None
+    assert logtail.trim_chunk(chunk, 5) is chunk
+    assert logtail.trim_chunk(chunk, 17) == {"start": 17, "end": 22, "lines": "line\n"}
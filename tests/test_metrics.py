@@ -0,0 +1,55 @@
+import pytest
+
+from gallery_dl_server import metrics
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "registry", [])
+
+
+def test_counter_with_labels():
+    counter = metrics.Counter("jobs", 'Jobs "finished"\nby status', ("status",))
+    counter.inc(labelvalues=("failed",))
+    counter.inc(2, labelvalues=("done",))
+    counter.inc(0.5, labelvalues=('a"b\\',))
+
+    assert counter.render().splitlines() == [
+        '# HELP jobs Jobs "finished"\\nby status',
+        "# TYPE jobs counter",
+        'jobs_total{status="a\\"b\\\\"} 0.5',
+        'jobs_total{status="done"} 2',
+        'jobs_total{status="failed"} 1',
+    ]
+
+
+def test_counter_without_labels_starts_at_zero():
+    assert metrics.Counter("files", "Files").samples() == [("_total", (), 0.0)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("duration", "Duration", (1.0, 5.0))
+    for value in (0.5, 1.0, 3, 10):
+        histogram.observe(value)
+
+    assert histogram.render().splitlines()[2:] == [
+        'duration_bucket{le="1"} 2',
+        'duration_bucket{le="5"} 3',
+        'duration_bucket{le="+Inf"} 4',
+        "duration_sum 14.5",
+        "duration_count 4",
+    ]
+
+
+def test_render_registry():
+    metrics.Gauge("queued", "Queued jobs", lambda: 3)
+    metrics.Counter("files", "Files")
+
+    assert metrics.render() == (
+        "# HELP queued Queued jobs\n"
+        "# TYPE queued gauge\n"
+        "queued 3\n"
+        "# HELP files Files\n"
+        "# TYPE files counter\n"
+        "files_total 0\n"
+    )
@@ -0,0 +1,55 @@
+import errno
+import logging
+import threading
+
+from gallery_dl_server import output
+
+
+def flush(writer: output.LogWriter, timeout=5.0):
+    """Wait until the writer has handled all queued messages, without blocking forever."""
+    event = threading.Event()
+    writer.queue.put((None, event))
+    return event.wait(timeout)
+
+
+def test_failed_rotation_keeps_writing(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "app.log"
+    log_file = output.LogFile(str(path))
+    log_file.open()
+
+    def rotate():
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(log_file, "rotate", rotate)
+
+    writer = output.LogWriter()
+    writer.configure_rotation(max_size=1, max_age=0, backups=0)
+
+    for line in ("first\n", "second\n", "third\n"):
+        writer.put(log_file, line)
+        assert flush(writer)
+
+    assert writer.thread is not None and writer.thread.is_alive()
+    assert path.read_text() == "first\nsecond\nthird\n"
+
+    err = capsys.readouterr().err
+    assert err.count("Failed to rotate log file") == 1
+    assert "No space left on device" in err
+
+    log_file.close()
+
+
+def test_websocket_filter():
+    def make_record(msg, *args):
+        return logging.LogRecord("uvicorn.error", logging.INFO, __file__, 1, msg, args, None)
+
+    websocket_filter = output.WebSocketFilter()
+
+    assert not websocket_filter.filter(
+        make_record('%s - "WebSocket /ws/logs" [accepted]', "1.2.3.4:5")
+    )
+    assert not websocket_filter.filter(
+        make_record('%s - "WebSocket /ws/progress" [accepted]', "1.2.3.4:5")
+    )
+    assert not websocket_filter.filter(make_record("connection closed"))
+    assert websocket_filter.filter(make_record("Application startup complete."))
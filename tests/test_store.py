@@ -0,0 +1,80 @@
+import sqlite3
+
+from gallery_dl_server import store
+
+
+def test_update_and_query(tmp_path):
+    job_store = store.JobStore(str(tmp_path / "jobs.db"))
+
+    ids = [job_store.insert(f"https://a.example/{i}", {"i": i}, "queued", 100.0) for i in range(3)]
+    job_store.update(ids[0], status="running", started=110.0)
+    job_store.update(ids[0], status="done", finished=125.0, exit_code=0, files=2, bytes=10)
+
+    job = job_store.get(ids[0])
+    assert job is not None
+    assert job["status"] == "done"
+    assert job["options"] == {"i": 0}
+    assert job["duration"] == 15.0
+    assert job_store.get(ids[1])["duration"] is None
+    assert job_store.get(12345) is None
+
+    assert [job["id"] for job in job_store.query()] == ids[::-1]
+    assert [job["id"] for job in job_store.query(status="queued")] == ids[:0:-1]
+    assert [job["id"] for job in job_store.query(before=ids[2], limit=1)] == [ids[1]]
+
+
+def test_unfinished_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    job_store = store.JobStore(path)
+    statuses = ["done", "interrupted", "failed", "paused", "queued"]
+    ids = [job_store.insert("https://a.example/", {}, status, 0.0) for status in statuses]
+    job_store.close()
+
+    job_store = store.JobStore(path)
+    unfinished = job_store.unfinished(("queued", "paused", "interrupted"))
+    assert [job["id"] for job in unfinished] == [ids[1], ids[3], ids[4]]
+
+
+def test_transaction_rolls_back(tmp_path):
+    job_store = store.JobStore(str(tmp_path / "jobs.db"))
+
+    try:
+        with job_store.transaction():
+            job_store.insert("https://a.example/", {}, "queued", 0.0)
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert job_store.query() == []
+
+
+def test_missing_columns_are_added(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, "
+        "options TEXT NOT NULL, status TEXT NOT NULL, created REAL NOT NULL, started REAL, "
+        "finished REAL, exit_code INTEGER, files INTEGER NOT NULL DEFAULT 0, "
+        "bytes INTEGER NOT NULL DEFAULT 0)"
+    )
+    connection.execute(
+        "INSERT INTO jobs (url, options, status, created) VALUES ('https://a.example/', '{}', "
+        "'done', 0)"
+    )
+    connection.commit()
+    connection.close()
+
+    job_store = store.JobStore(path)
+    job_store.update(1, error="Exceeded the time limit")
+    assert job_store.get(1)["error"] == "Exceeded the time limit"
+
+
+def test_spool_keeps_first_of_each_key():
+    spool = store.UrlSpool(sqlite3.connect(":memory:"))
+    spool.add([("a", "https://a.example/"), ("b", "https://b.example/")])
+    spool.add([("a", "HTTPS://A.EXAMPLE/"), ("c", "https://c.example/")])
+
+    assert spool.count == 3
+    assert list(spool) == ["https://a.example/", "https://b.example/", "https://c.example/"]